@@ -1,23 +1,167 @@
 from __future__ import annotations
 
 import csv
+import json
 
 from django.contrib import admin
 from django.contrib import messages
-from django.http import HttpResponse
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+from django.utils.text import smart_split
+from django.utils.text import unescape_string_literal
 
 from voteit.organisation.models import Organisation
 from voteit.organisation.admin import OrganisationAdmin as BaseOrganisationAdmin
 
+from voteit_org.audit import audited_update
+from voteit_org.health import refresh_organisation_health
+from voteit_org.memberships import refresh_membership_summary
+from voteit_org.models import ArchivedMembership
+from voteit_org.models import BulkAuditEntry
 from voteit_org.models import ContactInfo
+from voteit_org.models import JobRun
 from voteit_org.models import Membership
+from voteit_org.models import MembershipSummary
 from voteit_org.models import MembershipType
+from voteit_org.models import OrgCheckMail
+from voteit_org.models import OrganisationHealth
+
+CSV_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """
+    File-like object that hands written rows straight back to the csv writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, fieldnames: list[str], filename: str):
+    """
+    Stream queryset values as CSV, reading rows through a server-side cursor.
+    """
+    writer = csv.DictWriter(_Echo(), fieldnames=fieldnames)
+
+    def rows():
+        yield writer.writeheader()
+        values = queryset.values(*fieldnames)
+        for row in values.iterator(chunk_size=CSV_CHUNK_SIZE):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(rows(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+class TrigramSearchMixin:
+    """
+    Search organisation__title and text with one subquery per field. Each
+    subquery can use its trigram index from migration 0008 on Postgres, which
+    the default search's OR across the join to organisation can't.
+    """
+
+    search_fields = (
+        "organisation__title",
+        "text",
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        matches = self.model.objects.order_by()
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            queryset = queryset.filter(
+                Q(pk__in=matches.filter(text__icontains=bit).values("pk"))
+                | Q(
+                    pk__in=matches.filter(organisation__title__icontains=bit).values(
+                        "pk"
+                    )
+                )
+            )
+        return queryset, False
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Use the Postgres planner's row estimate instead of COUNT(*) for large results.
+    Small results, and other databases, get an exact count.
+    """
+
+    threshold = 10_000
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is not None and estimate > self.threshold:
+            return estimate
+        return super().count
+
+    def estimate(self) -> int | None:
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class MembershipYearFilter(admin.SimpleListFilter):
+    """
+    Organisations with a membership for a year, without joining memberships
+    into the main query and causing duplicate rows.
+    """
+
+    title = "Membership year"
+    parameter_name = "membership_year"
+
+    def lookups(self, request, model_admin):
+        years = (
+            Membership.objects.order_by("-year")
+            .values_list("year", flat=True)
+            .distinct()
+        )
+        return [(x, x) for x in years]
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            year = int(self.value())
+        except ValueError:
+            raise IncorrectLookupParameters(f"Invalid year {self.value()!r}")
+        return queryset.filter(
+            Exists(
+                Membership.objects.filter(
+                    organisation=OuterRef("organisation"), year=year
+                )
+            )
+        )
 
 
 @admin.register(ContactInfo)
-class ContactInfoAdmin(admin.ModelAdmin):
+class ContactInfoAdmin(TrigramSearchMixin, admin.ModelAdmin):
     autocomplete_fields = ("organisation",)
     ordering = ("organisation__title",)
+    list_select_related = ("organisation",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = (
         "organisation",
         "generic_email",
@@ -28,25 +172,19 @@ class ContactInfoAdmin(admin.ModelAdmin):
     list_filter = (
         "organisation__active",
         "requires_check",
-        "organisation__memberships__year",
+        MembershipYearFilter,
         "modified",
     )
-    search_fields = (
-        "organisation__title",
-        "text",
-    )
     actions = ["download_contacts_csv"]
 
-    @admin.display(boolean=True, description="Org active?")
+    @admin.display(
+        boolean=True, description="Org active?", ordering="organisation__active"
+    )
     def is_active(self, instance: ContactInfo):
         return instance.organisation.active
 
     @admin.action(description="Ladda ner kontakter som CSV")
     def download_contacts_csv(self, request, queryset):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = (
-            'attachment; filename="kontaktuppgifter_voteit.csv"'
-        )
         fieldnames = [
             "organisation__title",
             "generic_email",
@@ -56,16 +194,16 @@ class ContactInfoAdmin(admin.ModelAdmin):
             "modified",
             "requires_check",
         ]
-        writer = csv.DictWriter(response, fieldnames=fieldnames)
-        writer.writeheader()  # Custom?
-        writer.writerows(x for x in queryset.values(*fieldnames))
-        return response
+        return stream_csv(queryset, fieldnames, "kontaktuppgifter_voteit.csv")
 
 
 @admin.register(Membership)
-class MembershipAdmin(admin.ModelAdmin):
+class MembershipAdmin(TrigramSearchMixin, admin.ModelAdmin):
     autocomplete_fields = ("organisation",)
     ordering = ("organisation__title",)
+    list_select_related = ("organisation", "membership_type")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = (
         "__str__",
         "organisation",
@@ -79,17 +217,23 @@ class MembershipAdmin(admin.ModelAdmin):
         "membership_type",
         "organisation__active",
     )
-    search_fields = (
-        "organisation__title",
-        "text",
-    )
-    actions = ["mark_as_paid"]
+    actions = ["mark_as_paid", "download_memberships_csv"]
 
     @admin.action(description="Mark as paid")
     def mark_as_paid(self, request, queryset):
-        queryset = queryset.filter(paid=False)
-        changed = queryset.update(paid=True)
+        with transaction.atomic():
+            updated = audited_update(
+                Membership.objects.filter(pk__in=queryset.values("pk"), paid=False),
+                {"paid": True},
+                fields=["organisation_id", "year"],
+                user=request.user,
+                source="mark_as_paid",
+            )
+        changed = len(updated)
+        affected = set(updated.values())
         if changed:
+            refresh_membership_summary(x[1] for x in affected)
+            refresh_organisation_health(x[0] for x in affected)
             self.message_user(
                 request,
                 f"Marked {changed} as paid",
@@ -102,6 +246,18 @@ class MembershipAdmin(admin.ModelAdmin):
                 messages.WARNING,
             )
 
+    @admin.action(description="Ladda ner medlemskap som CSV")
+    def download_memberships_csv(self, request, queryset):
+        fieldnames = [
+            "organisation__title",
+            "year",
+            "membership_type__title",
+            "membership_type__price",
+            "paid",
+            "text",
+        ]
+        return stream_csv(queryset, fieldnames, "medlemskap_voteit.csv")
+
 
 @admin.register(MembershipType)
 class MembershipTypeAdmin(admin.ModelAdmin):
@@ -117,8 +273,195 @@ class MembershipTypeAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(MembershipSummary)
+class MembershipSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "year",
+        "membership_type",
+        "paid",
+        "count",
+        "total",
+    )
+    list_filter = (
+        "year",
+        "paid",
+        "membership_type",
+    )
+    list_select_related = ("membership_type",)
+    actions = ["refresh"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Refresh summary for selected years")
+    def refresh(self, request, queryset):
+        refresh_membership_summary(queryset.values_list("year", flat=True))
+        self.message_user(request, "Refreshed", messages.SUCCESS)
+
+
+@admin.register(JobRun)
+class JobRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "started",
+        "wall_time",
+        "query_count",
+        "query_time",
+        "emails_sent",
+        "rows_affected",
+        "success",
+    )
+    list_filter = (
+        "name",
+        "success",
+        "started",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OrgCheckMail)
+class OrgCheckMailAdmin(admin.ModelAdmin):
+    list_display = (
+        "contact_info",
+        "period",
+        "sent",
+        "attempts",
+    )
+    list_filter = (
+        "period",
+        ("sent", admin.EmptyFieldListFilter),
+    )
+    list_select_related = ("contact_info__organisation",)
+    search_fields = ("contact_info__organisation__title",)
+    readonly_fields = (
+        "contact_info",
+        "period",
+        "created",
+        "sent",
+        "attempts",
+        "error",
+        "claim_token",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(OrganisationHealth)
+class OrganisationHealthAdmin(admin.ModelAdmin):
+    list_display = (
+        "organisation",
+        "active",
+        "contact_complete",
+        "requires_check",
+        "contact_modified",
+        "latest_year",
+        "latest_paid",
+    )
+    list_filter = (
+        "active",
+        "requires_check",
+        "contact_complete",
+        "has_contact_info",
+        "latest_year",
+        "latest_paid",
+    )
+    list_select_related = ("organisation",)
+    ordering = ("organisation__title",)
+    search_fields = ("organisation__title",)
+    actions = ["refresh"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Refresh selected")
+    def refresh(self, request, queryset):
+        count = refresh_organisation_health(
+            queryset.values_list("organisation_id", flat=True)
+        )
+        self.message_user(request, f"Refreshed {count}", messages.SUCCESS)
+
+
+@admin.register(ArchivedMembership)
+class ArchivedMembershipAdmin(admin.ModelAdmin):
+    list_display = (
+        "__str__",
+        "organisation",
+        "year",
+        "membership_type",
+        "paid",
+        "archived",
+    )
+    list_filter = (
+        "year",
+        "membership_type",
+    )
+    list_select_related = ("organisation", "membership_type")
+    ordering = ("-year", "organisation__title")
+    search_fields = ("organisation__title",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BulkAuditEntry)
+class BulkAuditEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "created",
+        "content_type",
+        "action",
+        "source",
+        "user",
+        "object_count",
+    )
+    list_filter = (
+        "content_type",
+        "action",
+        "source",
+    )
+    list_select_related = ("content_type", "user")
+    date_hierarchy = "created"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Rows")
+    def object_count(self, instance: BulkAuditEntry):
+        return len(instance.object_ids)
+
+
 class MembershipInline(admin.TabularInline):
     model = Membership
+    ordering = ("-year",)
     fields = (
         "year",
         "membership_type",
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.db.models import Model
+from django.db.models import QuerySet
+
+from voteit_org.models import BulkAuditEntry
+
+# Object ids per entry, so a huge update doesn't end up in a single JSON value
+AUDIT_CHUNK_SIZE = 10_000
+
+
+def bulk_audit_entries(
+    model: type[Model],
+    object_ids: Iterable[int],
+    fields: Iterable[str],
+    values: dict | None = None,
+    action: str = BulkAuditEntry.ACTION_UPDATE,
+    user=None,
+    source: str = "",
+) -> list[BulkAuditEntry]:
+    """
+    Unsaved entries for a set of rows that got the same change.
+    Leave out values when rows got different values.
+    """
+    if not (object_ids := sorted(object_ids)):
+        return []
+    content_type = ContentType.objects.get_for_model(model)
+    return [
+        BulkAuditEntry(
+            content_type=content_type,
+            action=action,
+            object_ids=object_ids[i : i + AUDIT_CHUNK_SIZE],
+            fields=sorted(fields),
+            values=values or {},
+            user=user,
+            source=source,
+        )
+        for i in range(0, len(object_ids), AUDIT_CHUNK_SIZE)
+    ]
+
+
+def record_bulk_audit(entries: Iterable[BulkAuditEntry]) -> list[BulkAuditEntry]:
+    """
+    Save entries with a single INSERT. Call within the transaction that made
+    the changes.
+    """
+    if entries := [x for x in entries if x.object_ids]:
+        return BulkAuditEntry.objects.bulk_create(entries)
+    return []
+
+
+def audited_update(
+    queryset: QuerySet,
+    values: dict,
+    fields: Iterable[str] = (),
+    limit: int | None = None,
+    user=None,
+    source: str = "",
+) -> dict[int, tuple]:
+    """
+    queryset.update(**values), at most limit rows in pk order, with an audit
+    entry for the updated rows. Values must be plain values, not expressions.
+    Returns fields by pk for the updated rows. Call within a transaction.
+
+    On Postgres this is a single UPDATE ... RETURNING, however many rows match.
+    Elsewhere the rows are locked and selected first, so the entry lists exactly
+    the rows the update changes, and updated by pk in batches the database
+    can take as parameters.
+    """
+    model = queryset.model
+    fields = tuple(fields)
+    db = queryset.db
+    connection = connections[db]
+    locked = queryset.select_for_update(of=("self",)).order_by("pk")
+    if connection.vendor == "postgresql":
+        rows = _update_returning(
+            locked.values("pk")[:limit], values, fields, connection
+        )
+    else:
+        rows = list(locked.values_list("pk", *fields)[:limit])
+        batch_size = max(connection.ops.bulk_batch_size(["pk"], rows), 1)
+        for i in range(0, len(rows), batch_size):
+            model.objects.using(db).filter(
+                pk__in=[x[0] for x in rows[i : i + batch_size]]
+            ).update(**values)
+    updated = {x[0]: tuple(x[1:]) for x in rows}
+    record_bulk_audit(
+        bulk_audit_entries(model, updated, values, values, user=user, source=source)
+    )
+    return updated
+
+
+def _update_returning(locked: QuerySet, values: dict, fields, connection) -> list:
+    # The locking subquery waits for and rechecks rows changed concurrently,
+    # like a plain select_for_update would.
+    meta = locked.model._meta
+    quote = connection.ops.quote_name
+    subquery, params = locked.query.get_compiler(connection=connection).as_sql()
+    assignments = []
+    set_params = []
+    for name, value in values.items():
+        field = meta.get_field(name)
+        assignments.append(f"{quote(field.column)} = %s")
+        set_params.append(field.get_db_prep_save(value, connection=connection))
+    returning = [meta.pk.column, *(meta.get_field(x).column for x in fields)]
+    sql = (
+        f"UPDATE {quote(meta.db_table)} SET {', '.join(assignments)} "
+        f"WHERE {quote(meta.pk.column)} IN ({subquery}) "
+        f"RETURNING {', '.join(quote(x) for x in returning)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (*set_params, *params))
+        return cursor.fetchall()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from hashlib import md5
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+CONTACT_INFO_PREFIX = "voteit_org.contact_info"
+# Bumped to drop all entries at once, for instance after bulk updates
+CONTACT_INFO_GENERATION = f"{CONTACT_INFO_PREFIX}.generation"
+
+
+def _timeout() -> int:
+    return getattr(settings, "VOTEIT_ORG_CONTACT_INFO_CACHE_TIMEOUT", 3600)
+
+
+def contact_info_key(organisation_id: int) -> str:
+    generation = cache.get_or_set(CONTACT_INFO_GENERATION, 1, None)
+    return f"{CONTACT_INFO_PREFIX}.{generation}.{organisation_id}"
+
+
+async def acontact_info_key(organisation_id: int) -> str:
+    generation = await cache.aget_or_set(CONTACT_INFO_GENERATION, 1, None)
+    return f"{CONTACT_INFO_PREFIX}.{generation}.{organisation_id}"
+
+
+def build_contact_info_entry(pk: int, data: dict) -> dict:
+    """
+    Serialized contact info, with an ETag for conditional requests.
+    There's no Last-Modified, bulk updates like the nightly requires_check
+    flagging change the data without touching ContactInfo.modified.
+    """
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return {
+        "pk": pk,
+        "data": data,
+        "etag": f'"{md5(payload.encode()).hexdigest()}"',
+    }
+
+
+def get_contact_info_entry(organisation_id: int) -> dict | None:
+    """
+    Cached serialized contact info for an organisation, if any.
+    """
+    return cache.get(contact_info_key(organisation_id))
+
+
+async def aget_contact_info_entry(organisation_id: int) -> dict | None:
+    return await cache.aget(await acontact_info_key(organisation_id))
+
+
+def make_contact_info_entry(organisation_id: int, pk: int, data: dict):
+    """
+    Build and store an entry.
+    """
+    entry = build_contact_info_entry(pk, data)
+    cache.set(contact_info_key(organisation_id), entry, _timeout())
+    return entry
+
+
+async def amake_contact_info_entry(organisation_id: int, pk: int, data: dict):
+    entry = build_contact_info_entry(pk, data)
+    await cache.aset(await acontact_info_key(organisation_id), entry, _timeout())
+    return entry
+
+
+def invalidate_contact_info(organisation_id: int | None = None):
+    """
+    Drop cached contact info for one organisation, or for all if none is given.
+    """
+    if organisation_id is not None:
+        cache.delete(contact_info_key(organisation_id))
+        return
+    try:
+        cache.incr(CONTACT_INFO_GENERATION)
+    except ValueError:
+        cache.set(CONTACT_INFO_GENERATION, 2, None)
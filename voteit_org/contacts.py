@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from collections.abc import Iterator
+from itertools import batched
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+
+from voteit.organisation.models import Organisation
+from voteit_org.audit import bulk_audit_entries
+from voteit_org.audit import record_bulk_audit
+from voteit_org.cache import invalidate_contact_info
+from voteit_org.health import refresh_organisation_health
+from voteit_org.models import BulkAuditEntry
+from voteit_org.models import ContactInfo
+from voteit_org.sanitize import cached_relaxed_clean_html
+
+CONTACT_CREATED = "created"
+CONTACT_UPDATED = "updated"
+CONTACT_UNCHANGED = "unchanged"
+CONTACT_NOT_FOUND = "not_found"
+CONTACT_INVALID = "invalid"
+
+CONTACT_EMAIL_FIELDS = ("generic_email", "invoice_email")
+CONTACT_RICH_TEXT_FIELDS = ("invoice_info", "text")
+CONTACT_IMPORT_FIELDS = CONTACT_EMAIL_FIELDS + CONTACT_RICH_TEXT_FIELDS
+
+
+def _clean_contact_row(
+    row: dict, cleaned_html: dict[str, str], current: ContactInfo | None = None
+) -> dict:
+    """
+    Cleaned values for the columns present in row, so a partial file leaves
+    other fields alone. requires_check is only set when an email column is
+    present, or for new contact info.
+    """
+    values = {}
+    for name in CONTACT_EMAIL_FIELDS:
+        if (value := row.get(name)) is None:
+            continue
+        if value := value.strip():
+            validate_email(value)
+        values[name] = value
+    for name in CONTACT_RICH_TEXT_FIELDS:
+        if (value := row.get(name)) is not None:
+            values[name] = cleaned_html[value]
+    if current is None or values.keys() & set(CONTACT_EMAIL_FIELDS):
+        # Same rule as ContactInfo.save, imported info counts as checked otherwise
+        values["requires_check"] = not all(
+            values.get(name, getattr(current, name, ""))
+            for name in CONTACT_EMAIL_FIELDS
+        )
+    return values
+
+
+def _find_organisations(rows: list[dict]) -> tuple[dict, dict]:
+    """
+    Organisations for a batch by host and by title, with contact info, in one query.
+    Titles that aren't unique are left out.
+    """
+    hosts = {x["organisation__host"] for x in rows if x.get("organisation__host")}
+    titles = {x["organisation__title"] for x in rows if x.get("organisation__title")}
+    by_host = {}
+    by_title = {}
+    for org in Organisation.objects.filter(
+        Q(host__in=hosts) | Q(title__in=titles)
+    ).select_related("contact_info"):
+        by_host[org.host] = org
+        by_title[org.title] = None if org.title in by_title else org
+    return by_host, by_title
+
+
+def _import_audit_entries(saved) -> list[BulkAuditEntry]:
+    created = {}
+    updated = {}
+    for obj, current, changes in saved:
+        if current is None:
+            # Pk is set by bulk_create on Postgres and SQLite
+            if obj.pk:
+                created[obj.pk] = changes
+        else:
+            updated[current.pk] = changes
+    entries = []
+    for action, rows in (
+        (BulkAuditEntry.ACTION_CREATE, created),
+        (BulkAuditEntry.ACTION_UPDATE, updated),
+    ):
+        entries += bulk_audit_entries(
+            ContactInfo,
+            rows,
+            {name for changes in rows.values() for name in changes},
+            action=action,
+            source="import_contacts",
+        )
+    return entries
+
+
+def import_contacts(
+    rows: Iterable[dict], batch_size: int = 500, commit: bool = False
+) -> Iterator[dict]:
+    """
+    Upsert contact info from rows in the column layout of the contact CSV download,
+    with organisation__title and/or organisation__host to find the organisation.
+    Fields without a column in a row are left as they are.
+    Yields one result per row with status, organisation and changed fields as
+    (old, new). Nothing is saved unless commit is set.
+    """
+    touched = set()
+    for batch in batched(rows, batch_size):
+        by_host, by_title = _find_organisations(batch)
+        cleaned_html = cached_relaxed_clean_html.clean_many(
+            row[name]
+            for row in batch
+            for name in CONTACT_RICH_TEXT_FIELDS
+            if row.get(name) is not None
+        )
+        to_save = {}
+        fields = {}
+        for row in batch:
+            label = row.get("organisation__host") or row.get("organisation__title")
+            org = by_host.get(row.get("organisation__host")) or by_title.get(
+                row.get("organisation__title")
+            )
+            if org is None:
+                yield {"organisation": label, "status": CONTACT_NOT_FOUND}
+                continue
+            try:
+                current = org.contact_info
+            except ContactInfo.DoesNotExist:
+                current = None
+            try:
+                values = _clean_contact_row(row, cleaned_html, current)
+            except ValidationError as exc:
+                yield {
+                    "organisation": org.title,
+                    "status": CONTACT_INVALID,
+                    "error": " ".join(exc.messages),
+                }
+                continue
+            if current is None:
+                status = CONTACT_CREATED
+                changes = {k: ("", v) for k, v in values.items() if v}
+            else:
+                changes = {
+                    k: (getattr(current, k), v)
+                    for k, v in values.items()
+                    if getattr(current, k) != v
+                }
+                status = CONTACT_UPDATED if changes else CONTACT_UNCHANGED
+            if status != CONTACT_UNCHANGED:
+                # Last row wins if an organisation occurs more than once
+                to_save[org.pk] = (
+                    ContactInfo(organisation=org, **values),
+                    current,
+                    changes,
+                )
+                fields[org.pk] = tuple(sorted(values))
+            yield {"organisation": org.title, "status": status, "changes": changes}
+        if commit and to_save:
+            # Only the columns that were present are updated, one upsert per layout
+            by_fields = {}
+            for org_pk, (obj, current, changes) in to_save.items():
+                by_fields.setdefault(fields[org_pk], []).append(obj)
+            with transaction.atomic():
+                for names, objs in by_fields.items():
+                    ContactInfo.objects.bulk_create(
+                        objs,
+                        update_conflicts=True,
+                        unique_fields=["organisation"],
+                        update_fields=[*names, "modified"],
+                    )
+                record_bulk_audit(_import_audit_entries(to_save.values()))
+            touched.update(to_save)
+    if touched:
+        invalidate_contact_info()
+        refresh_organisation_health(touched)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+
+from voteit.organisation.models import Organisation
+from voteit_org.models import ArchivedMembership
+from voteit_org.models import Membership
+from voteit_org.models import OrganisationHealth
+
+HEALTH_FIELDS = (
+    "active",
+    "has_contact_info",
+    "contact_complete",
+    "requires_check",
+    "contact_modified",
+    "latest_year",
+    "latest_paid",
+    "updated",
+)
+
+
+def health_rows(organisations):
+    """
+    Health state per organisation from one query, with contact info joined
+    and the latest membership as subqueries. Archived memberships only count
+    for organisations without current ones.
+    """
+    latest = Membership.objects.filter(organisation=OuterRef("pk")).order_by("-year")
+    archived = ArchivedMembership.objects.filter(organisation=OuterRef("pk")).order_by(
+        "-year"
+    )
+    return organisations.values(
+        "pk",
+        "active",
+        "contact_info__pk",
+        "contact_info__generic_email",
+        "contact_info__invoice_email",
+        "contact_info__requires_check",
+        "contact_info__modified",
+    ).annotate(
+        latest_year=Coalesce(
+            Subquery(latest.values("year")[:1]),
+            Subquery(archived.values("year")[:1]),
+        ),
+        latest_paid=Coalesce(
+            Subquery(latest.values("paid")[:1]),
+            Subquery(archived.values("paid")[:1]),
+        ),
+    )
+
+
+def refresh_organisation_health(
+    organisation_ids: Iterable[int] | None = None, batch_size: int = 1000
+) -> int:
+    """
+    Upsert OrganisationHealth for some organisations, or all of them.
+    """
+    organisations = Organisation.objects.order_by()
+    if organisation_ids is not None:
+        organisation_ids = set(organisation_ids)
+        if not organisation_ids:
+            return 0
+        organisations = organisations.filter(pk__in=organisation_ids)
+    objs = [
+        OrganisationHealth(
+            organisation_id=x["pk"],
+            active=x["active"],
+            has_contact_info=x["contact_info__pk"] is not None,
+            contact_complete=bool(
+                x["contact_info__generic_email"] and x["contact_info__invoice_email"]
+            ),
+            requires_check=bool(x["contact_info__requires_check"]),
+            contact_modified=x["contact_info__modified"],
+            latest_year=x["latest_year"],
+            latest_paid=x["latest_paid"],
+        )
+        for x in health_rows(organisations)
+    ]
+    OrganisationHealth.objects.bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["organisation"],
+        update_fields=HEALTH_FIELDS,
+    )
+    return len(objs)
@@ -1,44 +1,161 @@
 from datetime import timedelta
+from functools import lru_cache
+from time import perf_counter
+from uuid import uuid4
 
+from django.conf import settings
 from django.db import models
+from django.db import transaction
 from django.template import loader
 from django.utils.html import strip_tags
 from django.utils.timezone import now
 from django_rq import job
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail import get_connection
 
 from voteit.core import RQ_LONG_QUEUE
 from voteit.core.decorators import schedule_job
 from voteit.core.loggers import notification_logger
+from voteit.organisation.models import Organisation
 from voteit.organisation.roles import ROLE_ORG_MANAGER
+from voteit_org.audit import audited_update
+from voteit_org.cache import invalidate_contact_info
+from voteit_org.health import refresh_organisation_health
+from voteit_org.mail import send_throttled
+from voteit_org.metrics import instrumented_job
+from voteit_org.metrics import record_emails
+from voteit_org.metrics import record_rows
 from voteit_org.models import ContactInfo
+from voteit_org.models import JobCheckpoint
+from voteit_org.models import OrgCheckMail
 
+STALE_AFTER = timedelta(days=365)
+CHECK_EMAIL_TEMPLATE = "voteit_org/check_org_email.html"
+CHECK_EMAIL_SUBJECT = "Kolla era uppgifter hos föreningen VoteIT"
+CHECK_EMAIL_FROM = "support@voteit.se"
+# Contacts per mailer job, each job costs a fixed number of queries and one connection
+CHECK_EMAIL_CHUNK_SIZE = 100
+# Rendered emails to keep per process
+CHECK_EMAIL_CACHE_SIZE = 1024
 
-@schedule_job("0 1 * * *")
-def org_might_require_check():
+
+def might_require_check_qs(since=None, cutoff=None):
+    """
+    Contacts that should be flagged for a check by their organisation.
+
+    Without since, every contact that is stale or lacks an email is included.
+    With since, only contacts that went stale between since and cutoff.
+    """
+    if cutoff is None:
+        cutoff = now() - STALE_AFTER
+    qs = ContactInfo.objects.filter(requires_check=False, organisation__active=True)
+    if since is not None:
+        return qs.filter(modified__lt=cutoff, modified__gte=since)
+    return qs.filter(
+        models.Q(modified__lt=cutoff)
+        | models.Q(invoice_email="")
+        | models.Q(generic_email="")
+    )
+
+
+def check_reminder_qs():
+    """
+    Flagged contacts that haven't been updated within 14 days.
+    """
     return (
-        ContactInfo.objects.filter(requires_check=False, organisation__active=True)
-        .filter(
-            models.Q(modified__lt=now() - timedelta(days=365))
-            | models.Q(invoice_email="")
-            | models.Q(generic_email="")
-        )
-        .update(requires_check=True)
+        ContactInfo.objects.filter(requires_check=True, organisation__active=True)
+        .filter(modified__lt=now() - timedelta(days=14))
+        .select_related("organisation")
+    )
+
+
+@schedule_job("0 1 * * *")
+@instrumented_job
+def org_might_require_check(batch_size: int | None = None, full: bool = False):
+    """
+    Flag contacts that need a check.
+
+    Missing emails are flagged when contact info is saved, so this only has to
+    find contacts that went stale since the previous run. The first run, or one
+    with full set, scans all contacts.
+
+    With a batch size (or the setting VOTEIT_ORG_CHECK_BATCH_SIZE) rows are
+    updated in pk order, one short transaction per batch, so row locks are only
+    held for a batch at a time.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, "VOTEIT_ORG_CHECK_BATCH_SIZE", None)
+    cutoff = now() - STALE_AFTER
+    checkpoint = JobCheckpoint.objects.filter(name="org_might_require_check").first()
+    since = None if full or checkpoint is None else checkpoint.timestamp
+    qs = might_require_check_qs(since, cutoff)
+    if batch_size:
+        flagged = _flag_in_batches(qs, batch_size)
+    else:
+        with transaction.atomic():
+            flagged = _flag_contacts(qs)
+    JobCheckpoint.objects.update_or_create(
+        name="org_might_require_check", defaults={"timestamp": cutoff}
+    )
+    if flagged:
+        invalidate_contact_info()
+        refresh_organisation_health(flagged.values())
+    return len(flagged)
+
+
+def _flag_contacts(qs, limit: int | None = None) -> dict[int, int]:
+    """
+    Flag contacts in qs, at most limit in pk order. Returns organisation id
+    by contact pk for the flagged ones. Call within a transaction.
+    """
+    flagged = audited_update(
+        qs,
+        {"requires_check": True},
+        fields=["organisation_id"],
+        limit=limit,
+        source="org_might_require_check",
     )
+    return {pk: org_id for pk, (org_id,) in flagged.items()}
+
+
+def _flag_in_batches(qs, batch_size: int) -> dict[int, int]:
+    flagged = {}
+    last_pk = 0
+    while True:
+        started = perf_counter()
+        with transaction.atomic():
+            batch = _flag_contacts(qs.filter(pk__gt=last_pk), batch_size)
+        if not batch:
+            break
+        flagged.update(batch)
+        last_pk = max(batch)
+        notification_logger.info(
+            "org_might_require_check: flagged %s in batch up to pk %s (%s total) in %.3fs",
+            len(batch),
+            last_pk,
+            len(flagged),
+            perf_counter() - started,
+        )
+    return flagged
 
 
 @schedule_job("0 10 15 * *")
+@instrumented_job
 def contact_org_about_check():
     """
     Send an email once a month with reminder for those who haven't updated
     """
-    contact_qs = (
-        ContactInfo.objects.filter(requires_check=True, organisation__active=True)
-        .filter(modified__lt=now() - timedelta(days=14))
-        .select_related("organisation")
+    contact_qs = check_reminder_qs()
+    contact_pks = list(
+        contact_qs.exclude(generic_email="").values_list("pk", flat=True)
     )
-    for contact in contact_qs.exclude(generic_email=""):
-        email_org_about_check.enqueue(contact_info_pk=contact.pk)
+    record_rows(len(contact_pks))
+    period = check_mail_period()
+    for i in range(0, len(contact_pks), CHECK_EMAIL_CHUNK_SIZE):
+        email_orgs_about_check.enqueue(
+            contact_info_pks=contact_pks[i : i + CHECK_EMAIL_CHUNK_SIZE],
+            period=period,
+        )
     if contact_qs.filter(invoice_email="").exists():
         output = "The following active organisations lack generic contact email, so we can't email them about updating their information: \n"
         for contact in contact_qs.filter(invoice_email=""):
@@ -46,38 +163,86 @@ def contact_org_about_check():
         notification_logger.warning(output)
 
 
-def render_org_check_email(contact: ContactInfo, org_managers: set[str]) -> str:
-    site_url = (
-        f"https://{contact.organisation.host}/"  # Good enough, we can assume that :)
-    )
-    return loader.render_to_string(
-        "voteit_org/check_org_email.html",
+def check_mail_period() -> str:
+    return now().strftime("%Y-%m")
+
+
+@lru_cache(maxsize=1)
+def _check_email_template():
+    # Template lookup and compilation, once per process
+    return loader.get_template(CHECK_EMAIL_TEMPLATE)
+
+
+@lru_cache(maxsize=CHECK_EMAIL_CACHE_SIZE)
+def _render_org_check(
+    org_title: str, host: str, org_managers: frozenset[str]
+) -> tuple[str, str]:
+    html_body = _check_email_template().render(
         context={
-            "site_url": site_url,
-            "org_title": contact.organisation.title,
-            "org_managers": org_managers,
+            "site_url": f"https://{host}/",  # Good enough, we can assume that :)
+            "org_title": org_title,
+            "org_managers": sorted(org_managers),
         },
     )
+    return html_body, strip_tags(html_body)
 
 
-@job(RQ_LONG_QUEUE)  # Basically for keeping data
-def email_org_about_check(contact_info_pk: int):
-    contact = ContactInfo.objects.get(pk=contact_info_pk)
-    org_managers = {
-        x.user.get_full_name()
-        for x in contact.organisation.roles.filter(assigned__contains=ROLE_ORG_MANAGER)
+def render_org_check_parts(
+    contact: ContactInfo, org_managers: set[str]
+) -> tuple[str, str]:
+    """
+    HTML and plain text body, memoized per organisation title, host and managers.
+    """
+    return _render_org_check(
+        contact.organisation.title,
+        contact.organisation.host,
+        frozenset(org_managers),
+    )
+
+
+def render_org_check_email(contact: ContactInfo, org_managers: set[str]) -> str:
+    return render_org_check_parts(contact, org_managers)[0]
+
+
+def get_org_managers(organisation_ids) -> dict[int, set[str]]:
+    """
+    Full names of org managers per organisation pk, loaded in a single query.
+    Organisations without managers are left out.
+    """
+    roles = Organisation._meta.get_field("roles")
+    role_model = roles.related_model
+    org_attname = roles.field.attname
+    qs = (
+        role_model.objects.filter(
+            **{f"{roles.field.name}__in": organisation_ids},
+            assigned__contains=ROLE_ORG_MANAGER,
+        )
         .exclude(user__email__endswith="@betahaus.net")
         .select_related("user")
-    }
-    html_body = render_org_check_email(contact, org_managers)
-    body = strip_tags(html_body)
-    send_mail(
-        subject="Kolla era uppgifter hos föreningen VoteIT",
-        message=body,
-        html_message=html_body,
-        from_email="support@voteit.se",
-        recipient_list=[contact.generic_email],
     )
+    results = {}
+    for role in qs:
+        results.setdefault(getattr(role, org_attname), set()).add(
+            role.user.get_full_name()
+        )
+    return results
+
+
+def _org_check_message(
+    contact: ContactInfo, org_managers: set[str]
+) -> EmailMultiAlternatives:
+    html_body, text_body = render_org_check_parts(contact, org_managers)
+    msg = EmailMultiAlternatives(
+        subject=CHECK_EMAIL_SUBJECT,
+        body=text_body,
+        from_email=CHECK_EMAIL_FROM,
+        to=[contact.generic_email],
+    )
+    msg.attach_alternative(html_body, "text/html")
+    return msg
+
+
+def _org_check_output(contact: ContactInfo, org_managers: set[str]) -> str:
     output = f"Epostade {contact.organisation.title} @ {contact.organisation.host} på adressen {contact.generic_email} om koll av organisation."
     if not org_managers:
         notification_logger.warning(
@@ -85,3 +250,94 @@ def email_org_about_check(contact_info_pk: int):
             + "\nDet fanns inga aktiva organisationsansvariga, denna organisation behöver hanteras manuellt."
         )
     return output
+
+
+@job(RQ_LONG_QUEUE)  # Basically for keeping data
+@instrumented_job
+def email_orgs_about_check(contact_info_pks: list[int], period: str | None = None):
+    """
+    Email a chunk of contacts over a single, rate limited, connection.
+    Each contact is claimed before sending, so contacts that are already sent
+    for this period, or claimed by an overlapping job, are skipped and runs
+    can be resumed or repeated.
+
+    A contact that was claimed but never marked as sent means a job died
+    while sending it. Whether it went out is unknown, so it's left for a
+    manual check instead of risking sending it twice. Failed contacts, and
+    contacts that never reached the connection because the job failed before
+    that, are released and retried by the next run.
+    """
+    if period is None:
+        period = check_mail_period()
+    contacts = list(
+        ContactInfo.objects.filter(pk__in=contact_info_pks)
+        .exclude(generic_email="")
+        .select_related("organisation")
+    )
+    OrgCheckMail.objects.bulk_create(
+        [OrgCheckMail(contact_info=x, period=period) for x in contacts],
+        ignore_conflicts=True,
+    )
+    # Conditional UPDATE, only one job can set its token on a row
+    claim_token = uuid4()
+    OrgCheckMail.objects.filter(
+        contact_info__in=contacts,
+        period=period,
+        sent__isnull=True,
+        claim_token__isnull=True,
+    ).update(claim_token=claim_token)
+    claimed = set(
+        OrgCheckMail.objects.filter(claim_token=claim_token).values_list(
+            "contact_info_id", flat=True
+        )
+    )
+    contacts = [x for x in contacts if x.pk in claimed]
+    managers = get_org_managers([x.organisation_id for x in contacts])
+    outputs = []
+
+    def mark_sent(contact: ContactInfo, attempts: int):
+        # One write per message, a crash leaves at most this one unconfirmed
+        OrgCheckMail.objects.filter(contact_info=contact, period=period).update(
+            sent=now(), attempts=models.F("attempts") + attempts, error=""
+        )
+        org_managers = managers.get(contact.organisation_id, set())
+        outputs.append(_org_check_output(contact, org_managers))
+
+    def mark_failed(contact: ContactInfo, error: str, attempts: int):
+        OrgCheckMail.objects.filter(contact_info=contact, period=period).update(
+            attempts=models.F("attempts") + attempts, error=error, claim_token=None
+        )
+        notification_logger.warning(
+            f"Kunde inte eposta {contact.organisation.title} på adressen {contact.generic_email}: {error}"
+        )
+
+    # Claimed contacts not yet handed to the connection
+    pending = {x.pk for x in contacts}
+
+    def build_messages():
+        for contact in contacts:
+            org_managers = managers.get(contact.organisation_id, set())
+            message = _org_check_message(contact, org_managers)
+            pending.discard(contact.pk)
+            yield contact, message
+
+    try:
+        if contacts:
+            with get_connection() as connection:
+                record_emails(
+                    send_throttled(connection, build_messages(), mark_sent, mark_failed)
+                )
+    except Exception as exc:
+        # Never attempted, so they can be sent by the next run
+        OrgCheckMail.objects.filter(
+            claim_token=claim_token, contact_info_id__in=pending
+        ).update(claim_token=None, error=repr(exc))
+        raise
+    record_rows(len(contacts))
+    return "\n".join(outputs)
+
+
+@job(RQ_LONG_QUEUE)  # Basically for keeping data
+@instrumented_job
+def email_org_about_check(contact_info_pk: int):
+    return email_orgs_about_check(contact_info_pks=[contact_info_pk])
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Callable
+from collections.abc import Iterable
+from smtplib import SMTPException
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+
+from voteit.core.loggers import notification_logger
+
+
+class TokenBucket:
+    """
+    Allow rate messages per second on average, with bursts up to capacity.
+    Clock and sleep can be replaced, for instance in tests.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = time.sleep,
+    ):
+        assert rate > 0
+        self.rate = rate
+        self.capacity = max(capacity or rate, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        current = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (current - self.updated) * self.rate
+        )
+        self.updated = current
+
+    def take(self):
+        """
+        Take a token, waiting for one if needed.
+        """
+        self._refill()
+        if self.tokens < 1:
+            self.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+class SharedRateLimit:
+    """
+    Allow rate messages per second across every process that shares the cache,
+    so parallel mailer jobs together stay within the provider's limit.
+    Messages are counted per window of capacity / rate seconds with cache.incr,
+    at most capacity per window, so a window boundary can let two windows'
+    worth through back to back. Clock is wall time, since it's shared.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        key: str = "voteit_org:mail_rate",
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], Any] = time.sleep,
+    ):
+        assert rate > 0
+        self.capacity = max(int(capacity or rate), 1)
+        self.window = self.capacity / rate
+        self.key = key
+        self.clock = clock
+        self.sleep = sleep
+
+    def take(self):
+        """
+        Take a slot in the current window, waiting for the next one if needed.
+        """
+        while True:
+            current = self.clock()
+            window = int(current // self.window)
+            key = f"{self.key}:{window}"
+            cache.add(key, 0, math.ceil(self.window) + 1)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                # Expired in between
+                continue
+            if count <= self.capacity:
+                return
+            self.sleep((window + 1) * self.window - current)
+
+
+def default_bucket() -> SharedRateLimit:
+    return SharedRateLimit(
+        rate=getattr(settings, "VOTEIT_ORG_MAIL_RATE", 5),
+        capacity=getattr(settings, "VOTEIT_ORG_MAIL_BURST", None),
+    )
+
+
+def send_throttled(
+    connection,
+    messages: Iterable[tuple[Any, EmailMessage]],
+    on_sent: Callable[[Any, int], Any],
+    on_failed: Callable[[Any, str, int], Any],
+    bucket: TokenBucket | SharedRateLimit | None = None,
+    retries: int | None = None,
+    backoff: float | None = None,
+) -> int:
+    """
+    Send (key, message) pairs one at a time through connection, within the
+    rate of the bucket, by default the one shared by all mailer jobs. Failed
+    messages are retried with exponential backoff. on_sent is called with key
+    and attempts after each sent message, so the caller can record progress,
+    and on_failed with key, error and attempts when retries are exhausted.
+    Returns the number of sent messages.
+    """
+    if bucket is None:
+        bucket = default_bucket()
+    if retries is None:
+        retries = getattr(settings, "VOTEIT_ORG_MAIL_RETRIES", 3)
+    if backoff is None:
+        backoff = getattr(settings, "VOTEIT_ORG_MAIL_BACKOFF", 2.0)
+    sent = 0
+    for key, message in messages:
+        attempts = 0
+        while True:
+            bucket.take()
+            attempts += 1
+            try:
+                connection.send_messages([message])
+            except (SMTPException, OSError) as exc:
+                notification_logger.warning("Sending to %s failed: %r", message.to, exc)
+                if attempts > retries:
+                    on_failed(key, repr(exc), attempts)
+                    break
+                # The connection may be broken, reopen it once here. Left
+                # to send_messages, it would open and close per message.
+                connection.close()
+                bucket.sleep(backoff * 2 ** (attempts - 1))
+                try:
+                    connection.open()
+                except (SMTPException, OSError):
+                    pass
+            else:
+                sent += 1
+                on_sent(key, attempts)
+                break
+    return sent
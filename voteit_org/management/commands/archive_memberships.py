@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from django.core.management import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Q
+from django.utils.timezone import now
+
+from voteit_org.audit import bulk_audit_entries
+from voteit_org.audit import record_bulk_audit
+from voteit_org.health import refresh_organisation_health
+from voteit_org.models import ArchivedMembership
+from voteit_org.models import BulkAuditEntry
+from voteit_org.models import Membership
+
+
+class Command(BaseCommand):
+    help = (
+        "Move closed, fully paid membership years to the archive, "
+        "oldest first and up to the first year with unpaid memberships"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            help="Archive years before this one, as YYYY. Defaults to the current year",
+            type=int,
+        )
+        parser.add_argument(
+            "--commit", help="Save result", default=False, action="store_true"
+        )
+
+    def handle(self, *args, **options):
+        before = options["before"] or now().year
+        years = list(
+            Membership.objects.filter(year__lt=before)
+            .order_by("year")
+            .values("year")
+            .annotate(
+                total=Count("pk"),
+                unpaid=Count("pk", filter=Q(paid=False)),
+            )
+        )
+        if not years:
+            self.stdout.write(self.style.WARNING(f"Inga medlemsår före {before}"))
+            return
+        closed = []
+        for row in years:
+            if row["unpaid"]:
+                # Archived years are always older than current ones
+                self.stdout.write(
+                    f"{row['year']}: {row['unpaid']} av {row['total']} obetalda, "
+                    "stannar här"
+                )
+                break
+            self.stdout.write(
+                self.style.SUCCESS(f"{row['year']}: {row['total']} arkiveras")
+            )
+            closed.append(row["year"])
+        if not closed:
+            return
+        if not options.get("commit"):
+            self.stdout.write(self.style.WARNING("DRY-RUN: Specify --commit to save"))
+            return
+        for year in closed:
+            # One short transaction per year
+            with transaction.atomic():
+                moved = archive_year(year)
+                refresh_organisation_health(
+                    ArchivedMembership.objects.filter(year=year).values_list(
+                        "organisation_id", flat=True
+                    )
+                )
+            self.stdout.write(self.style.SUCCESS(f"{year}: {moved} arkiverade"))
+
+
+def archive_year(year: int) -> int:
+    """
+    Move all memberships for year with INSERT ... SELECT and DELETE, with a bulk
+    audit entry for the archived rows. Must run in a transaction. Summary rows
+    for the year are kept as they are.
+    """
+    archived = now()
+    quote = connection.ops.quote_name
+    fields = ("organisation", "year", "membership_type", "paid", "text")
+    source_columns = [Membership._meta.get_field(x).column for x in fields] + ["id"]
+    target_columns = [
+        ArchivedMembership._meta.get_field(x).column
+        for x in fields + ("original_id", "archived")
+    ]
+    source = quote(Membership._meta.db_table)
+    target = quote(ArchivedMembership._meta.db_table)
+    year_column = quote(Membership._meta.get_field("year").column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {target} ({', '.join(map(quote, target_columns))}) "
+            f"SELECT {', '.join(map(quote, source_columns))}, %s "
+            f"FROM {source} WHERE {year_column} = %s",
+            [connection.ops.adapt_datetimefield_value(archived), year],
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"DELETE FROM {source} WHERE {year_column} = %s", [year])
+    record_bulk_audit(
+        bulk_audit_entries(
+            ArchivedMembership,
+            ArchivedMembership.objects.filter(year=year, archived=archived).values_list(
+                "pk", flat=True
+            ),
+            fields + ("original_id", "archived"),
+            {"year": year},
+            action=BulkAuditEntry.ACTION_CREATE,
+            source="archive_memberships",
+        )
+    )
+    return moved
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from time import perf_counter
+
+from django.core.management import BaseCommand
+from django.core.management import CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.test.utils import teardown_test_environment
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark jobs, admin and API of voteit_org against generated data "
+        "in a throwaway test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organisations", type=int, default=1000, help="Organisations to create"
+        )
+        parser.add_argument(
+            "--years", type=int, default=3, help="Membership years per organisation"
+        )
+        parser.add_argument(
+            "--managers", type=int, default=1, help="Managers per organisation"
+        )
+        parser.add_argument("--output", help="Save results as JSON here")
+        parser.add_argument("--baseline", help="Compare with results from this file")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            help="Allowed relative slowdown against the baseline, defaults to 0.25",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            # Not part of the installed package
+            from voteit_org.tests.benchmark import BENCHMARK_TOLERANCE
+            from voteit_org.tests.benchmark import compare
+            from voteit_org.tests.benchmark import generate_data
+            from voteit_org.tests.benchmark import load_baseline
+            from voteit_org.tests.benchmark import run_benchmarks
+            from voteit_org.tests.benchmark import save_results
+        except ImportError:
+            raise CommandError("Benchmarks need a checkout of voteit_org with tests")
+        baseline = load_baseline(options["baseline"]) if options["baseline"] else None
+        # Test environment gives locmem email and lets the test client in
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = perf_counter()
+            data = generate_data(
+                options["organisations"],
+                years=options["years"],
+                managers=options["managers"],
+            )
+            self.stdout.write(
+                f"Skapade {options['organisations']} organisationer på "
+                f"{perf_counter() - started:.1f}s ({connection.vendor})"
+            )
+            results = run_benchmarks(data)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        for result in results:
+            self.stdout.write(
+                f"{result.name:>35}: {result.wall_time:8.3f}s "
+                f"{result.query_count:6} queries ({result.query_time:.3f}s)"
+            )
+        if options["output"]:
+            save_results(options["output"], results, options["organisations"])
+        if baseline is None:
+            return
+        if baseline.get("vendor") != connection.vendor or (
+            baseline.get("organisations") != options["organisations"]
+        ):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Baseline is for {baseline.get('organisations')} organisations "
+                    f"on {baseline.get('vendor')}, numbers may not be comparable"
+                )
+            )
+        tolerance = options["tolerance"]
+        if tolerance is None:
+            tolerance = BENCHMARK_TOLERANCE
+        if regressions := compare(baseline, results, tolerance):
+            raise CommandError("Regressions:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
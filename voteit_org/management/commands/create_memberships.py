@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+from collections import Counter
 
 from django.core.management import BaseCommand
 from django.db import transaction
 
-from voteit.organisation.models import Organisation
+from voteit_org.audit import bulk_audit_entries
+from voteit_org.audit import record_bulk_audit
+from voteit_org.health import refresh_organisation_health
+from voteit_org.memberships import refresh_membership_summary
+from voteit_org.memberships import planned_memberships
+from voteit_org.models import ArchivedMembership
+from voteit_org.models import BulkAuditEntry
+from voteit_org.models import Membership
 from voteit_org.models import MembershipType
 
 
@@ -13,19 +21,41 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("year", help="Year, as YYYY")
+        parser.add_argument(
+            "--until",
+            help="Create for every year up to and including this one, as YYYY",
+            type=int,
+        )
         parser.add_argument(
             "--mem",
-            help="Membership type, specified as primary key or title",
+            help="Membership type, specified as primary key or title. "
+            "With --carry-forward, the type for organisations without one to keep",
             required=True,
         )
+        parser.add_argument(
+            "--carry-forward",
+            help="Keep the type of each organisation's latest membership, if active",
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "--batch-size",
+            help="Number of memberships per INSERT",
+            type=int,
+            default=1000,
+        )
         parser.add_argument(
             "--commit", help="Save result", default=False, action="store_true"
         )
 
     def handle(self, *args, **options):
         year = options["year"]
-        int(year)  # Just to make sure
         assert len(year) == 4
+        year = int(year)  # Just to make sure
+        years = range(year, (options["until"] or year) + 1)
+        if not years:
+            exit("--until can't be before year")
+        span = str(year) if len(years) == 1 else f"{years[0]}-{years[-1]}"
         try:
             membership = MembershipType.objects.get(pk=int(options["mem"]))
         except ValueError:
@@ -34,26 +64,74 @@ class Command(BaseCommand):
             ).first()
         if not membership:
             exit("Membership not found")
-        self.stdout.write(f"Skapar medlemskap '{membership}' för året {year}")
-        orgs_qs = Organisation.objects.filter(active=True)
-        if exclude_count := orgs_qs.filter(memberships__year=year).count():
-            self.stdout.write(f"Skippar {exclude_count} som redan var skapade")
-        orgs_qs = orgs_qs.exclude(memberships__year=year)
-        if create_count := orgs_qs.count():
-            with transaction.atomic(durable=True):
-                self.stdout.write(
-                    self.style.SUCCESS(f"{create_count} kommer skapas...")
-                )
-                for org in orgs_qs:
-                    org.memberships.create(year=year, membership_type=membership)
-                if options.get("commit"):
-                    self.stdout.write(self.style.SUCCESS("All done, saving"))
-                else:
-                    self.stdout.write(
-                        self.style.WARNING("DRY-RUN: Specify --commit to save")
-                    )
-                    transaction.set_rollback(True)
+        if not membership.active:
+            exit(f"{membership} is not active")
+        archived = ArchivedMembership.objects.filter(year__in=years)
+        if archived_years := sorted(set(archived.values_list("year", flat=True))):
+            exit(f"{', '.join(map(str, archived_years))} is archived")
+        if options["carry_forward"]:
+            self.stdout.write(
+                f"Skapar medlemskap för {span} med samma typ som förra gången, "
+                f"annars '{membership}'"
+            )
         else:
+            self.stdout.write(f"Skapar medlemskap '{membership}' för {span}")
+        # Years that active orgs already have, only counted for the output
+        existing = Membership.objects.filter(
+            year__in=years, organisation__active=True
+        ).count()
+        to_create = [
+            Membership(organisation_id=org_pk, year=y, membership_type_id=type_pk)
+            for org_pk, y, type_pk in planned_memberships(
+                years, membership, carry_forward=options["carry_forward"]
+            )
+        ]
+        if existing:
+            self.stdout.write(f"Skippar {existing} som redan var skapade")
+        if not to_create:
             self.stdout.write(
                 self.style.WARNING("Inga organisationer behövde uppdateras för året")
             )
+            return
+        plan = Counter((x.year, x.membership_type_id) for x in to_create)
+        types = MembershipType.objects.in_bulk({x[1] for x in plan})
+        for (plan_year, type_pk), count in sorted(plan.items()):
+            self.stdout.write(f"  {plan_year} {types[type_pk]}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"{len(to_create)} kommer skapas..."))
+        if not options.get("commit"):
+            self.stdout.write(self.style.WARNING("DRY-RUN: Specify --commit to save"))
+            return
+        with transaction.atomic(durable=True):
+            # Conflicts may only happen if someone else created memberships
+            # since we checked, in that case the existing ones are kept.
+            Membership.objects.bulk_create(
+                to_create,
+                batch_size=options["batch_size"],
+                ignore_conflicts=True,
+            )
+            # Pks aren't returned with ignore_conflicts, so look up the planned
+            # organisation and year pairs. Rows that someone else created for a
+            # pair in the meantime are left out if they have another type.
+            planned = {
+                (x.organisation_id, x.year): x.membership_type_id for x in to_create
+            }
+            created = {}
+            for pk, org_pk, created_year, type_pk in Membership.objects.filter(
+                year__in=years
+            ).values_list("pk", "organisation_id", "year", "membership_type_id"):
+                if planned.get((org_pk, created_year)) == type_pk:
+                    created.setdefault((created_year, type_pk), []).append(pk)
+            entries = []
+            for (created_year, type_pk), pks in created.items():
+                entries += bulk_audit_entries(
+                    Membership,
+                    pks,
+                    ["organisation", "year", "membership_type"],
+                    {"year": created_year, "membership_type": type_pk},
+                    action=BulkAuditEntry.ACTION_CREATE,
+                    source="create_memberships",
+                )
+            record_bulk_audit(entries)
+            refresh_membership_summary(years)
+            refresh_organisation_health({x.organisation_id for x in to_create})
+        self.stdout.write(self.style.SUCCESS("All done, saving"))
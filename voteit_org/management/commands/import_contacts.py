@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+
+from django.core.management import BaseCommand
+from django.core.management import CommandError
+
+from voteit_org.contacts import CONTACT_CREATED
+from voteit_org.contacts import CONTACT_INVALID
+from voteit_org.contacts import CONTACT_NOT_FOUND
+from voteit_org.contacts import CONTACT_UNCHANGED
+from voteit_org.contacts import CONTACT_UPDATED
+from voteit_org.contacts import import_contacts
+
+
+def read_rows(path: Path, format: str):
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        if format == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import contact info from CSV or JSONL in the same layout as the admin "
+        "download. Organisations are found by organisation__host or "
+        "organisation__title, modified and requires_check are ignored. Fields "
+        "without a column are left as they are."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="CSV or JSONL file", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Defaults to the file suffix",
+        )
+        parser.add_argument(
+            "--batch-size",
+            help="Rows per lookup and INSERT",
+            type=int,
+            default=500,
+        )
+        parser.add_argument(
+            "--commit", help="Save result", default=False, action="store_true"
+        )
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        if not path.is_file():
+            raise CommandError(f"{path} finns inte")
+        format = options["format"] or (
+            "jsonl" if path.suffix in (".jsonl", ".json") else "csv"
+        )
+        commit = options["commit"]
+        counts = dict.fromkeys(
+            (
+                CONTACT_CREATED,
+                CONTACT_UPDATED,
+                CONTACT_UNCHANGED,
+                CONTACT_NOT_FOUND,
+                CONTACT_INVALID,
+            ),
+            0,
+        )
+        for result in import_contacts(
+            read_rows(path, format), batch_size=options["batch_size"], commit=commit
+        ):
+            status = result["status"]
+            counts[status] += 1
+            if status == CONTACT_NOT_FOUND:
+                self.stdout.write(
+                    self.style.WARNING(f"Hittade inte {result['organisation']}")
+                )
+            elif status == CONTACT_INVALID:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"{result['organisation']}: ogiltig rad, {result['error']}"
+                    )
+                )
+            elif status != CONTACT_UNCHANGED and (
+                not commit or options["verbosity"] > 1
+            ):
+                self.stdout.write(f"{result['organisation']} ({status})")
+                for name, (old, new) in result["changes"].items():
+                    self.stdout.write(f"  {name}: {old!r} -> {new!r}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Skapade {counts[CONTACT_CREATED]}, "
+                f"uppdaterade {counts[CONTACT_UPDATED]}, "
+                f"oförändrade {counts[CONTACT_UNCHANGED]}"
+            )
+        )
+        if skipped := counts[CONTACT_NOT_FOUND] + counts[CONTACT_INVALID]:
+            self.stdout.write(self.style.WARNING(f"Skippade {skipped} rader"))
+        if not commit:
+            self.stdout.write(self.style.WARNING("DRY-RUN: Specify --commit to save"))
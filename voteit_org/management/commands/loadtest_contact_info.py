@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.core.management import CommandError
+from django.test import AsyncClient
+from django.urls import NoReverseMatch
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the sync and async contact-info endpoints, "
+        "with concurrent GET requests through the ASGI handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="An org manager to request as")
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Requests per endpoint"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="Requests in flight"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError("No such user")
+        urls = {"sync": reverse("contact-info-list")}
+        try:
+            urls["async"] = reverse("contact-info-async")
+        except NoReverseMatch:
+            raise CommandError("Include voteit_org.urls to test the async endpoint")
+        host = user.organisation.host
+        for name, url in urls.items():
+            elapsed, statuses = asyncio.run(
+                self.run(user, host, url, options["requests"], options["concurrency"])
+            )
+            self.stdout.write(
+                f"{name:>5}: {options['requests'] / elapsed:.1f} req/s "
+                f"({elapsed:.2f}s, status codes {statuses})"
+            )
+
+    async def run(self, user, host: str, url: str, requests: int, concurrency: int):
+        client = AsyncClient(headers={"host": host})
+        await client.aforce_login(user)
+        semaphore = asyncio.Semaphore(concurrency)
+        statuses = {}
+
+        async def request():
+            async with semaphore:
+                response = await client.get(url)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = perf_counter()
+        await asyncio.gather(*(request() for _ in range(requests)))
+        return perf_counter() - started, statuses
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import Exists
+from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Coalesce
+
+from voteit.organisation.models import Organisation
+from voteit_org.audit import audited_update
+from voteit_org.health import refresh_organisation_health
+from voteit_org.models import ArchivedMembership
+from voteit_org.models import Membership
+from voteit_org.models import MembershipSummary
+from voteit_org.models import MembershipType
+
+PAYMENT_UPDATED = "updated"
+PAYMENT_UNCHANGED = "unchanged"
+PAYMENT_NOT_FOUND = "not_found"
+
+
+def reconcile_payments(rows: list[dict], user=None) -> list[dict]:
+    """
+    Set paid status from rows with organisation (pk), year and paid.
+    Runs in one transaction with one select and at most two audited updates,
+    and returns one result per row with a status added.
+    """
+    results = []
+    with transaction.atomic():
+        memberships = Membership.objects.filter(
+            organisation_id__in={x["organisation"] for x in rows},
+            year__in={x["year"] for x in rows},
+        ).select_for_update()
+        current = {}
+        keys = {}
+        original = {}
+        for pk, org_pk, year, paid in memberships.values_list(
+            "pk", "organisation_id", "year", "paid"
+        ):
+            current[(org_pk, year)] = pk
+            keys[pk] = (org_pk, year)
+            original[pk] = paid
+        wanted = dict(original)
+        for row in rows:
+            pk = current.get((row["organisation"], row["year"]))
+            if pk is None:
+                status = PAYMENT_NOT_FOUND
+            elif wanted[pk] == row["paid"]:
+                status = PAYMENT_UNCHANGED
+            else:
+                status = PAYMENT_UPDATED
+                wanted[pk] = row["paid"]
+            results.append({**row, "status": status})
+        changed = set()
+        for paid in (True, False):
+            pks = [k for k, v in wanted.items() if v == paid and original[k] != paid]
+            if pks:
+                audited_update(
+                    Membership.objects.filter(pk__in=pks),
+                    {"paid": paid},
+                    user=user,
+                    source="reconcile_payments",
+                )
+                changed.update(keys[x] for x in pks)
+        if changed:
+            refresh_membership_summary(x[1] for x in changed)
+            refresh_organisation_health(x[0] for x in changed)
+    return results
+
+
+def refresh_membership_summary(years: Iterable[int] | None = None):
+    """
+    Recompute MembershipSummary rows for some years, or all of them.
+    Cost is one aggregate over the affected years plus a replace of their rows.
+    Archived years are left as they were when archived.
+    """
+    archived = ArchivedMembership.objects.order_by().values("year").distinct()
+    memberships = Membership.objects.exclude(year__in=archived)
+    summaries = MembershipSummary.objects.exclude(year__in=archived)
+    if years is not None:
+        years = set(years)
+        if not years:
+            return
+        memberships = memberships.filter(year__in=years)
+        summaries = summaries.filter(year__in=years)
+    rows = (
+        memberships.order_by()
+        .values("year", "membership_type", "paid")
+        .annotate(count=Count("pk"), total=Sum("membership_type__price"))
+    )
+    with transaction.atomic():
+        summaries.delete()
+        # Upsert, a concurrent save may have added a row since the delete
+        MembershipSummary.objects.bulk_create(
+            (
+                MembershipSummary(
+                    year=x["year"],
+                    membership_type_id=x["membership_type"],
+                    paid=x["paid"],
+                    count=x["count"],
+                    total=x["total"] or 0,
+                )
+                for x in rows
+            ),
+            update_conflicts=True,
+            unique_fields=["year", "membership_type", "paid"],
+            update_fields=["count", "total"],
+        )
+
+
+def apply_membership_summary_deltas(deltas: dict[tuple[int, int, bool], int]):
+    """
+    Add count deltas per (year, membership_type pk, paid) to MembershipSummary,
+    with totals from the current prices. Used for single saves, so the cost is
+    a couple of queries per touched row instead of a recount of the year.
+
+    Each row is changed with UPDATE ... SET count = count + delta, which locks
+    it, so concurrent writers in the same year serialize on that row instead of
+    replacing each other's work. Rows that reach zero are removed.
+    """
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    prices = dict(
+        MembershipType.objects.filter(pk__in={x[1] for x in deltas}).values_list(
+            "pk", "price"
+        )
+    )
+    with transaction.atomic():
+        for (year, type_pk, paid), count in sorted(deltas.items()):
+            total = count * prices.get(type_pk, 0)
+            summaries = MembershipSummary.objects.filter(
+                year=year, membership_type_id=type_pk, paid=paid
+            )
+            while not summaries.update(
+                count=F("count") + count, total=F("total") + total
+            ):
+                if count < 0:
+                    # Nothing to subtract from, a refresh will sort it out
+                    break
+                try:
+                    with transaction.atomic():
+                        MembershipSummary.objects.create(
+                            year=year,
+                            membership_type_id=type_pk,
+                            paid=paid,
+                            count=count,
+                            total=total,
+                        )
+                    break
+                except IntegrityError:
+                    # Created by someone else in the meantime, add to theirs
+                    continue
+            if count < 0:
+                summaries.filter(count__lte=0).delete()
+
+
+def rollover_types(before_year: int, default: MembershipType):
+    """
+    Active organisations annotated with rollover_type, the membership type they
+    roll over to for before_year. That's the type of their latest membership
+    before before_year, archived or not, if the type is still active.
+    Otherwise default.
+    """
+    latest = Membership.objects.filter(
+        organisation=OuterRef("pk"), year__lt=before_year
+    ).order_by("-year")
+    archived = ArchivedMembership.objects.filter(
+        organisation=OuterRef("pk"), year__lt=before_year
+    ).order_by("-year")
+    return Organisation.objects.filter(active=True).annotate(
+        latest_type=Coalesce(
+            Subquery(latest.values("membership_type")[:1]),
+            Subquery(archived.values("membership_type")[:1]),
+        ),
+        rollover_type=Case(
+            When(
+                Exists(
+                    MembershipType.objects.filter(
+                        pk=OuterRef("latest_type"), active=True
+                    )
+                ),
+                then=F("latest_type"),
+            ),
+            default=Value(default.pk),
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def planned_memberships(
+    years: Iterable[int], default: MembershipType, carry_forward: bool = False
+):
+    """
+    Memberships that active organisations lack in years, as
+    (organisation pk, year, type pk) from one query. The type is default, or
+    with carry_forward the rollover type for each year, so memberships that
+    already exist in years count as the latest one for the years after.
+    """
+    planned = []
+    for year in years:
+        if carry_forward:
+            orgs = rollover_types(year, default)
+        else:
+            orgs = Organisation.objects.filter(active=True).annotate(
+                rollover_type=Value(default.pk, output_field=IntegerField())
+            )
+        planned.append(
+            orgs.exclude(
+                Exists(
+                    Membership.objects.filter(organisation=OuterRef("pk"), year=year)
+                )
+            )
+            .annotate(planned_year=Value(year, output_field=IntegerField()))
+            .order_by()
+            .values_list("pk", "planned_year", "rollover_type")
+        )
+    return planned[0].union(*planned[1:], all=True)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from django.utils.timezone import now
+
+from voteit_org.models import JobRun
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobMetrics:
+    name: str
+    started: datetime
+    wall_time: float = 0.0
+    query_count: int = 0
+    query_time: float = 0.0
+    emails_sent: int = 0
+    rows_affected: int | None = None
+    success: bool = True
+    error: str = ""
+    profile: str = ""
+
+    def __call__(self, execute, sql, params, many, context):
+        # Used as a database execute wrapper
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.query_time += perf_counter() - started
+
+
+_current: ContextVar[JobMetrics | None] = ContextVar("voteit_org_job", default=None)
+
+
+def record_emails(count: int):
+    """
+    Add sent emails to the running job, if any.
+    """
+    if metrics := _current.get():
+        metrics.emails_sent += count
+
+
+def record_rows(count: int):
+    """
+    Set affected rows for the running job, if any.
+    Jobs returning an int get that as rows affected unless this was called.
+    """
+    if metrics := _current.get():
+        metrics.rows_affected = count
+
+
+def instrumented_job(func):
+    """
+    Record wall time, queries, emails and affected rows for each run of a job
+    as a JobRun. Settings:
+
+    VOTEIT_ORG_METRICS_DIR
+        Also write Prometheus text files here, one per job.
+    VOTEIT_ORG_PROFILE_DIR
+        Profile runs and dump stats here for runs slower than
+        VOTEIT_ORG_PROFILE_THRESHOLD seconds (default 60).
+
+    Jobs called from within another instrumented job count towards that job.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current.get() is not None:
+            return func(*args, **kwargs)
+        metrics = JobMetrics(name=func.__name__, started=now())
+        token = _current.set(metrics)
+        profile_dir = getattr(settings, "VOTEIT_ORG_PROFILE_DIR", None)
+        profiler = cProfile.Profile() if profile_dir else None
+        started = perf_counter()
+        result = None
+        try:
+            with connection.execute_wrapper(metrics):
+                if profiler:
+                    result = profiler.runcall(func, *args, **kwargs)
+                else:
+                    result = func(*args, **kwargs)
+        except Exception as exc:
+            metrics.success = False
+            metrics.error = repr(exc)
+            raise
+        finally:
+            metrics.wall_time = perf_counter() - started
+            _current.reset(token)
+            if metrics.rows_affected is None and isinstance(result, int):
+                metrics.rows_affected = result
+            if profiler:
+                _dump_profile(profiler, metrics, profile_dir)
+            _save(metrics)
+        return result
+
+    return wrapper
+
+
+def _dump_profile(profiler: cProfile.Profile, metrics: JobMetrics, profile_dir):
+    if metrics.wall_time < getattr(settings, "VOTEIT_ORG_PROFILE_THRESHOLD", 60):
+        return
+    filename = f"{metrics.name}-{metrics.started:%Y%m%dT%H%M%S}.prof"
+    path = Path(profile_dir) / filename
+    try:
+        profiler.dump_stats(path)
+    except OSError:
+        logger.exception("Couldn't write profile for %s", metrics.name)
+    else:
+        metrics.profile = str(path)
+
+
+def _save(metrics: JobMetrics):
+    try:
+        JobRun.objects.create(
+            name=metrics.name,
+            started=metrics.started,
+            wall_time=metrics.wall_time,
+            query_count=metrics.query_count,
+            query_time=metrics.query_time,
+            emails_sent=metrics.emails_sent,
+            rows_affected=metrics.rows_affected,
+            success=metrics.success,
+            error=metrics.error,
+            profile=metrics.profile,
+        )
+    except Exception:
+        # Never let bookkeeping hide the outcome of the job itself
+        logger.exception("Couldn't save run of %s", metrics.name)
+    if metrics_dir := getattr(settings, "VOTEIT_ORG_METRICS_DIR", None):
+        try:
+            write_textfile(metrics, metrics_dir)
+        except OSError:
+            logger.exception("Couldn't write metrics for %s", metrics.name)
+
+
+def write_textfile(metrics: JobMetrics, metrics_dir) -> Path:
+    """
+    Write metrics in Prometheus text format, for node exporter's textfile collector.
+    """
+    label = f'{{job="{metrics.name}"}}'
+    started = metrics.started.timestamp()
+    values = (
+        ("duration_seconds", "Wall time of the last run", metrics.wall_time),
+        ("queries", "Database queries in the last run", metrics.query_count),
+        ("query_seconds", "Database time in the last run", metrics.query_time),
+        ("emails_sent", "Emails sent in the last run", metrics.emails_sent),
+        ("rows_affected", "Rows affected by the last run", metrics.rows_affected or 0),
+        ("success", "1 if the last run succeeded", int(metrics.success)),
+        ("started_timestamp_seconds", "Start of the last run", started),
+    )
+    lines = []
+    for name, help_text, value in values:
+        lines.append(f"# HELP voteit_org_job_{name} {help_text}")
+        lines.append(f"# TYPE voteit_org_job_{name} gauge")
+        lines.append(f"voteit_org_job_{name}{label} {value}")
+    path = Path(metrics_dir) / f"voteit_org_{metrics.name}.prom"
+    tmp_path = path.with_suffix(".prom.tmp")
+    tmp_path.write_text("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+    return path
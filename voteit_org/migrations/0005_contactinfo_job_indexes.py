@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("voteit_org", "0004_remove_membership_canceled"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contactinfo",
+            index=models.Index(
+                condition=models.Q(("requires_check", False)),
+                fields=["modified"],
+                name="contactinfo_unchecked_mod_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contactinfo",
+            index=models.Index(
+                condition=models.Q(("requires_check", True)),
+                fields=["modified"],
+                name="contactinfo_check_mod_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contactinfo",
+            index=models.Index(
+                condition=models.Q(
+                    ("requires_check", False),
+                    models.Q(
+                        ("invoice_email", ""),
+                        ("generic_email", ""),
+                        _connector="OR",
+                    ),
+                ),
+                fields=["organisation"],
+                name="contactinfo_missing_email_idx",
+            ),
+        ),
+    ]
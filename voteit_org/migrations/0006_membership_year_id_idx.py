@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("voteit_org", "0005_contactinfo_job_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="membership",
+            index=models.Index(fields=["year", "id"], name="membership_year_id_idx"),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_summary(apps, schema_editor):
+    Membership = apps.get_model("voteit_org", "Membership")
+    MembershipSummary = apps.get_model("voteit_org", "MembershipSummary")
+    rows = (
+        Membership.objects.order_by()
+        .values("year", "membership_type", "paid")
+        .annotate(
+            count=models.Count("pk"), total=models.Sum("membership_type__price")
+        )
+    )
+    MembershipSummary.objects.bulk_create(
+        MembershipSummary(
+            year=x["year"],
+            membership_type_id=x["membership_type"],
+            paid=x["paid"],
+            count=x["count"],
+            total=x["total"] or 0,
+        )
+        for x in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("voteit_org", "0006_membership_year_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MembershipSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField(verbose_name="Year")),
+                ("paid", models.BooleanField(verbose_name="Paid?")),
+                (
+                    "count",
+                    models.PositiveIntegerField(default=0, verbose_name="Count"),
+                ),
+                (
+                    "total",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Total price"
+                    ),
+                ),
+                (
+                    "membership_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="voteit_org.membershiptype",
+                        verbose_name="Membership Type",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Membership summaries",
+                "ordering": ["-year", "membership_type", "paid"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("year", "membership_type", "paid"),
+                        name="unique_membership_summary",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:20
+"""
+Trigram indexes for the admin search fields.
+
+Django runs icontains as UPPER(column::text) LIKE UPPER(...) on Postgres,
+so GIN trigram indexes on that expression are used by the admin search, which
+looks up each field in its own subquery (see admin.TrigramSearchMixin).
+Other databases (SQLite in development) skip these and search with a scan.
+
+The organisation title index is on voteit.organisation's table but owned by
+this app, under this app's prefix. It's only created if that column exists,
+and is dropped by name, so reversing works whatever the organisation app
+has migrated to since. If that app drops the column, Postgres drops the
+index with it.
+"""
+
+from django.db import migrations
+
+SEARCH_COLUMNS = (
+    ("organisation", "Organisation", "title", "voteit_org_org_title_trgm"),
+    ("voteit_org", "ContactInfo", "text", "voteit_org_ci_text_trgm"),
+    ("voteit_org", "Membership", "text", "voteit_org_mem_text_trgm"),
+)
+
+
+def _has_column(connection, table: str, column: str) -> bool:
+    introspection = connection.introspection
+    with connection.cursor() as cursor:
+        if table not in introspection.table_names(cursor):
+            return False
+        return column in {
+            x.name for x in introspection.get_table_description(cursor, table)
+        }
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # Not using TrigramExtension, since that import requires psycopg
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    quote = schema_editor.quote_name
+    for app_label, model_name, column, index_name in SEARCH_COLUMNS:
+        table = apps.get_model(app_label, model_name)._meta.db_table
+        if not _has_column(schema_editor.connection, table, column):
+            continue
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote(index_name)} ON {quote(table)} "
+            f"USING gin ((UPPER({quote(column)}::text)) gin_trgm_ops)"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for *_, index_name in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f"DROP INDEX IF EXISTS {schema_editor.quote_name(index_name)}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organisation", "0009_auto_20230525_1526"),
+        ("voteit_org", "0007_membershipsummary"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
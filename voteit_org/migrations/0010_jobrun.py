@@ -0,0 +1,65 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("voteit_org", "0009_jobcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(db_index=True, max_length=100, verbose_name="Job"),
+                ),
+                ("started", models.DateTimeField(verbose_name="Started")),
+                ("wall_time", models.FloatField(verbose_name="Wall time (s)")),
+                ("query_count", models.PositiveIntegerField(verbose_name="Queries")),
+                ("query_time", models.FloatField(verbose_name="Query time (s)")),
+                (
+                    "emails_sent",
+                    models.PositiveIntegerField(default=0, verbose_name="Emails sent"),
+                ),
+                (
+                    "rows_affected",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Rows affected"
+                    ),
+                ),
+                (
+                    "success",
+                    models.BooleanField(default=True, verbose_name="Success?"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, default="", verbose_name="Error"),
+                ),
+                (
+                    "profile",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=255,
+                        verbose_name="Profile dump",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-started"],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("voteit_org", "0010_jobrun"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrgCheckMail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        help_text="As YYYY-MM", max_length=7, verbose_name="Period"
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created"),
+                ),
+                (
+                    "sent",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Sent"),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Attempts"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, default="", verbose_name="Last error"),
+                ),
+                (
+                    "contact_info",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="check_mails",
+                        to="voteit_org.contactinfo",
+                        verbose_name="Contact info",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("contact_info", "period"),
+                        name="unique_org_check_mail_period",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_health(apps, schema_editor):
+    Organisation = apps.get_model("organisation", "Organisation")
+    Membership = apps.get_model("voteit_org", "Membership")
+    OrganisationHealth = apps.get_model("voteit_org", "OrganisationHealth")
+    latest = Membership.objects.filter(
+        organisation=models.OuterRef("pk")
+    ).order_by("-year")
+    rows = (
+        Organisation.objects.order_by()
+        .values(
+            "pk",
+            "active",
+            "contact_info__pk",
+            "contact_info__generic_email",
+            "contact_info__invoice_email",
+            "contact_info__requires_check",
+            "contact_info__modified",
+        )
+        .annotate(
+            latest_year=models.Subquery(latest.values("year")[:1]),
+            latest_paid=models.Subquery(latest.values("paid")[:1]),
+        )
+    )
+    OrganisationHealth.objects.bulk_create(
+        (
+            OrganisationHealth(
+                organisation_id=x["pk"],
+                active=x["active"],
+                has_contact_info=x["contact_info__pk"] is not None,
+                contact_complete=bool(
+                    x["contact_info__generic_email"]
+                    and x["contact_info__invoice_email"]
+                ),
+                requires_check=bool(x["contact_info__requires_check"]),
+                contact_modified=x["contact_info__modified"],
+                latest_year=x["latest_year"],
+                latest_paid=x["latest_paid"],
+            )
+            for x in rows
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organisation", "0009_auto_20230525_1526"),
+        ("voteit_org", "0011_orgcheckmail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrganisationHealth",
+            fields=[
+                (
+                    "organisation",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="health",
+                        serialize=False,
+                        to="organisation.organisation",
+                        verbose_name="Organisation",
+                    ),
+                ),
+                ("active", models.BooleanField(verbose_name="Active?")),
+                (
+                    "has_contact_info",
+                    models.BooleanField(verbose_name="Has contact info?"),
+                ),
+                (
+                    "contact_complete",
+                    models.BooleanField(verbose_name="Contact emails complete?"),
+                ),
+                ("requires_check", models.BooleanField(verbose_name="Requires check?")),
+                (
+                    "contact_modified",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Contact info modified"
+                    ),
+                ),
+                (
+                    "latest_year",
+                    models.PositiveSmallIntegerField(
+                        blank=True, null=True, verbose_name="Latest membership year"
+                    ),
+                ),
+                (
+                    "latest_paid",
+                    models.BooleanField(
+                        blank=True, null=True, verbose_name="Latest membership paid?"
+                    ),
+                ),
+                ("updated", models.DateTimeField(auto_now=True, verbose_name="Updated")),
+            ],
+            options={
+                "verbose_name_plural": "Organisation health",
+                "indexes": [
+                    models.Index(
+                        fields=["active", "latest_year", "latest_paid"],
+                        name="orghealth_membership_idx",
+                    ),
+                    models.Index(
+                        fields=["active", "requires_check", "contact_modified"],
+                        name="orghealth_contact_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_health, migrations.RunPython.noop),
+    ]
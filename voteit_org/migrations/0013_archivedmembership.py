@@ -0,0 +1,73 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organisation", "0009_auto_20230525_1526"),
+        ("voteit_org", "0012_organisationhealth"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="membership",
+            options={"get_latest_by": "-year"},
+        ),
+        migrations.CreateModel(
+            name="ArchivedMembership",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField(verbose_name="Year")),
+                ("paid", models.BooleanField(verbose_name="Paid?")),
+                (
+                    "text",
+                    models.TextField(blank=True, default="", verbose_name="Comments"),
+                ),
+                (
+                    "original_id",
+                    models.BigIntegerField(verbose_name="Original membership id"),
+                ),
+                ("archived", models.DateTimeField(verbose_name="Archived")),
+                (
+                    "membership_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="+",
+                        to="voteit_org.membershiptype",
+                        verbose_name="Membership Type",
+                    ),
+                ),
+                (
+                    "organisation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="archived_memberships",
+                        to="organisation.organisation",
+                        verbose_name="Organisation",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("organisation", "year"),
+                        name="unique_archived_membership_year",
+                    )
+                ],
+                "indexes": [
+                    models.Index(fields=["year"], name="archived_membership_year_idx"),
+                ],
+            },
+        ),
+    ]
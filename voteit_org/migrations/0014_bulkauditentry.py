@@ -0,0 +1,102 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.core.serializers.json
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("voteit_org", "0013_archivedmembership"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BulkAuditEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created"),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[("create", "Create"), ("update", "Update")],
+                        max_length=10,
+                        verbose_name="Action",
+                    ),
+                ),
+                (
+                    "object_ids",
+                    models.JSONField(default=list, verbose_name="Object ids"),
+                ),
+                (
+                    "fields",
+                    models.JSONField(default=list, verbose_name="Changed fields"),
+                ),
+                (
+                    "values",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="When all rows got the same values",
+                        verbose_name="New values",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Job, command or admin action",
+                        max_length=100,
+                        verbose_name="Source",
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="contenttypes.contenttype",
+                        verbose_name="Model",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Bulk audit entries",
+                "ordering": ["-created"],
+                "indexes": [
+                    models.Index(
+                        fields=["content_type", "created"],
+                        name="bulkaudit_type_created_idx",
+                    )
+                ],
+            },
+        ),
+    ]
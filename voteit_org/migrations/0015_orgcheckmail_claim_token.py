@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("voteit_org", "0014_bulkauditentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orgcheckmail",
+            name="claim_token",
+            field=models.UUIDField(
+                blank=True,
+                help_text="Set by the job sending it, cleared again if sending failed",
+                null=True,
+                verbose_name="Claimed by",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("voteit_org", "0015_orgcheckmail_claim_token"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="archivedmembership",
+            constraint=models.UniqueConstraint(
+                fields=("original_id",), name="unique_archived_membership_original"
+            ),
+        ),
+    ]
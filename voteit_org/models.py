@@ -1,13 +1,18 @@
 from __future__ import annotations
 from datetime import datetime
+from uuid import UUID
 
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from rules.contrib.models import RulesModelMixin
 
 from voteit.core.abcs import OrganisationContext
 from voteit.core.fields import RichTextField
-from voteit.core.utils import relaxed_clean_html
 from voteit.organisation.models import Organisation
+from voteit_org.sanitize import cached_relaxed_clean_html
 
 
 class ContactInfo(RulesModelMixin, OrganisationContext):
@@ -21,7 +26,7 @@ class ContactInfo(RulesModelMixin, OrganisationContext):
         verbose_name="Contact text or other notes",
         blank=True,
         default="",
-        html_cleaner=relaxed_clean_html,
+        html_cleaner=cached_relaxed_clean_html,
     )
     generic_email: str = models.EmailField(
         verbose_name="Generic contact email",
@@ -37,7 +42,7 @@ class ContactInfo(RulesModelMixin, OrganisationContext):
         verbose_name="Invoice info/address",
         blank=True,
         default="",
-        html_cleaner=relaxed_clean_html,
+        html_cleaner=cached_relaxed_clean_html,
     )
     modified: datetime = models.DateTimeField(
         editable=False,
@@ -48,9 +53,58 @@ class ContactInfo(RulesModelMixin, OrganisationContext):
         default=False,
     )
 
+    class Meta:
+        indexes = [
+            # Scheduled jobs in voteit_org.jobs scan on these
+            models.Index(
+                name="contactinfo_unchecked_mod_idx",
+                fields=("modified",),
+                condition=models.Q(requires_check=False),
+            ),
+            models.Index(
+                name="contactinfo_check_mod_idx",
+                fields=("modified",),
+                condition=models.Q(requires_check=True),
+            ),
+            models.Index(
+                name="contactinfo_missing_email_idx",
+                fields=("organisation",),
+                condition=models.Q(requires_check=False)
+                & (models.Q(invoice_email="") | models.Q(generic_email="")),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.organisation.title} contacts"
 
+    @property
+    def missing_email(self) -> bool:
+        return not (self.generic_email and self.invoice_email)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored rich text was cleaned when saved, deferred fields are left out
+        instance._loaded_html = {
+            name: instance.__dict__[name]
+            for name in ("text", "invoice_info")
+            if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Rich text that is still what was loaded doesn't need parsing again
+        for name, value in getattr(self, "_loaded_html", {}).items():
+            if getattr(self, name) == value:
+                cached_relaxed_clean_html.mark_clean(value)
+        # Incomplete contact info always requires a check, the nightly job
+        # only handles contact info that grows old.
+        if self.missing_email and not self.requires_check:
+            self.requires_check = True
+            if (update_fields := kwargs.get("update_fields")) is not None:
+                kwargs["update_fields"] = {*update_fields, "requires_check"}
+        super().save(*args, **kwargs)
+
     objects: models.Manager
 
 
@@ -81,17 +135,47 @@ class Membership(OrganisationContext):
 
     class Meta:
         constraints = [
+            # Archived years are checked by save, not by bulk_create or update
             models.UniqueConstraint(
                 name="unique_membership_year",
                 fields=("organisation", "year"),
             ),
         ]
+        indexes = [
+            # Keyset pagination in the REST API
+            models.Index(name="membership_year_id_idx", fields=("year", "id")),
+        ]
         get_latest_by = "-year"
-        ordering = ["-year"]
 
     def __str__(self):
         return f"{self.organisation.title} {self.year}"
 
+    def clean(self):
+        super().clean()
+        self._check_archived()
+
+    def save(self, *args, **kwargs):
+        # Also for objects.create and saves without full_clean
+        update_fields = kwargs.get("update_fields")
+        checked = {"organisation", "organisation_id", "year"}
+        if update_fields is None or checked.intersection(update_fields):
+            self._check_archived()
+        super().save(*args, **kwargs)
+
+    def _check_archived(self):
+        # Archived rows are in another table, so unique_membership_year can't
+        # catch this. Bulk paths check archived years themselves.
+        if (
+            self.organisation_id
+            and self.year
+            and ArchivedMembership.objects.filter(
+                organisation_id=self.organisation_id, year=self.year
+            ).exists()
+        ):
+            raise ValidationError(
+                {"year": "This year is archived for the organisation"}
+            )
+
     objects: models.Manager
 
 
@@ -118,3 +202,376 @@ class MembershipType(models.Model):
         return self.title
 
     objects: models.Manager
+
+
+class MembershipSummary(models.Model):
+    """
+    Precomputed count and price totals per year, type and paid status.
+    Kept up to date by voteit_org.memberships.refresh_membership_summary
+    """
+
+    year: int = models.PositiveSmallIntegerField(
+        verbose_name="Year",
+    )
+    membership_type: MembershipType = models.ForeignKey(
+        MembershipType,
+        verbose_name="Membership Type",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    paid: bool = models.BooleanField(
+        verbose_name="Paid?",
+    )
+    count: int = models.PositiveIntegerField(
+        verbose_name="Count",
+        default=0,
+    )
+    total: int = models.PositiveBigIntegerField(
+        verbose_name="Total price",
+        default=0,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name="unique_membership_summary",
+                fields=("year", "membership_type", "paid"),
+            ),
+        ]
+        ordering = ["-year", "membership_type", "paid"]
+        verbose_name_plural = "Membership summaries"
+
+    def __str__(self):
+        return f"{self.year} {self.membership_type} {'paid' if self.paid else 'unpaid'}"
+
+    objects: models.Manager
+
+
+class JobCheckpoint(models.Model):
+    """
+    High-water marks for scheduled jobs that only handle new rows.
+    """
+
+    name: str = models.CharField(
+        verbose_name="Name",
+        max_length=100,
+        unique=True,
+    )
+    timestamp: datetime = models.DateTimeField(
+        verbose_name="Timestamp",
+    )
+
+    def __str__(self):
+        return f"{self.name} @ {self.timestamp}"
+
+    objects: models.Manager
+
+
+class JobRun(models.Model):
+    """
+    Metrics for a run of a scheduled job, see voteit_org.metrics
+    """
+
+    name: str = models.CharField(
+        verbose_name="Job",
+        max_length=100,
+        db_index=True,
+    )
+    started: datetime = models.DateTimeField(
+        verbose_name="Started",
+    )
+    wall_time: float = models.FloatField(
+        verbose_name="Wall time (s)",
+    )
+    query_count: int = models.PositiveIntegerField(
+        verbose_name="Queries",
+    )
+    query_time: float = models.FloatField(
+        verbose_name="Query time (s)",
+    )
+    emails_sent: int = models.PositiveIntegerField(
+        verbose_name="Emails sent",
+        default=0,
+    )
+    rows_affected: int | None = models.PositiveIntegerField(
+        verbose_name="Rows affected",
+        null=True,
+        blank=True,
+    )
+    success: bool = models.BooleanField(
+        verbose_name="Success?",
+        default=True,
+    )
+    error: str = models.TextField(
+        verbose_name="Error",
+        default="",
+        blank=True,
+    )
+    profile: str = models.CharField(
+        verbose_name="Profile dump",
+        max_length=255,
+        default="",
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ["-started"]
+
+    def __str__(self):
+        return f"{self.name} {self.started}"
+
+    objects: models.Manager
+
+
+class OrgCheckMail(models.Model):
+    """
+    Reminder emails about checking contact info, one per contact and period.
+    Makes reminder runs resumable without sending anything twice.
+    """
+
+    contact_info: ContactInfo = models.ForeignKey(
+        ContactInfo,
+        verbose_name="Contact info",
+        on_delete=models.CASCADE,
+        related_name="check_mails",
+    )
+    period: str = models.CharField(
+        verbose_name="Period",
+        max_length=7,
+        help_text="As YYYY-MM",
+    )
+    created: datetime = models.DateTimeField(
+        verbose_name="Created",
+        auto_now_add=True,
+    )
+    sent: datetime | None = models.DateTimeField(
+        verbose_name="Sent",
+        null=True,
+        blank=True,
+    )
+    attempts: int = models.PositiveSmallIntegerField(
+        verbose_name="Attempts",
+        default=0,
+    )
+    error: str = models.TextField(
+        verbose_name="Last error",
+        default="",
+        blank=True,
+    )
+    claim_token: UUID | None = models.UUIDField(
+        verbose_name="Claimed by",
+        null=True,
+        blank=True,
+        help_text="Set by the job sending it, cleared again if sending failed",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name="unique_org_check_mail_period",
+                fields=("contact_info", "period"),
+            ),
+        ]
+        ordering = ["-created"]
+
+    def __str__(self):
+        return f"{self.contact_info} {self.period}"
+
+    objects: models.Manager
+
+
+class OrganisationHealth(models.Model):
+    """
+    Denormalized contact and membership state per organisation.
+    Kept up to date by voteit_org.health.refresh_organisation_health
+    """
+
+    organisation: Organisation = models.OneToOneField(
+        Organisation,
+        verbose_name="Organisation",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="health",
+    )
+    active: bool = models.BooleanField(
+        verbose_name="Active?",
+    )
+    has_contact_info: bool = models.BooleanField(
+        verbose_name="Has contact info?",
+    )
+    contact_complete: bool = models.BooleanField(
+        verbose_name="Contact emails complete?",
+    )
+    requires_check: bool = models.BooleanField(
+        verbose_name="Requires check?",
+    )
+    contact_modified: datetime | None = models.DateTimeField(
+        verbose_name="Contact info modified",
+        null=True,
+        blank=True,
+    )
+    latest_year: int | None = models.PositiveSmallIntegerField(
+        verbose_name="Latest membership year",
+        null=True,
+        blank=True,
+    )
+    latest_paid: bool | None = models.BooleanField(
+        verbose_name="Latest membership paid?",
+        null=True,
+        blank=True,
+    )
+    updated: datetime = models.DateTimeField(
+        verbose_name="Updated",
+        auto_now=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                name="orghealth_membership_idx",
+                fields=("active", "latest_year", "latest_paid"),
+            ),
+            models.Index(
+                name="orghealth_contact_idx",
+                fields=("active", "requires_check", "contact_modified"),
+            ),
+        ]
+        verbose_name_plural = "Organisation health"
+
+    def __str__(self):
+        return f"{self.organisation.title} health"
+
+    objects: models.Manager
+
+
+class ArchivedMembership(models.Model):
+    """
+    Memberships from closed, fully paid years, moved out of Membership by the
+    archive_memberships command. Read only.
+    """
+
+    organisation: Organisation = models.ForeignKey(
+        Organisation,
+        verbose_name="Organisation",
+        on_delete=models.RESTRICT,
+        related_name="archived_memberships",
+    )
+    year: int = models.PositiveSmallIntegerField(
+        verbose_name="Year",
+    )
+    membership_type: MembershipType = models.ForeignKey(
+        MembershipType,
+        verbose_name="Membership Type",
+        on_delete=models.RESTRICT,
+        related_name="+",
+    )
+    paid: bool = models.BooleanField(
+        verbose_name="Paid?",
+    )
+    text: str = models.TextField(
+        verbose_name="Comments",
+        default="",
+        blank=True,
+    )
+    original_id: int = models.BigIntegerField(
+        verbose_name="Original membership id",
+    )
+    archived: datetime = models.DateTimeField(
+        verbose_name="Archived",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name="unique_archived_membership_year",
+                fields=("organisation", "year"),
+            ),
+            # A membership is archived once, also by concurrent bulk moves
+            models.UniqueConstraint(
+                name="unique_archived_membership_original",
+                fields=("original_id",),
+            ),
+        ]
+        indexes = [
+            models.Index(name="archived_membership_year_idx", fields=("year",)),
+        ]
+
+    def __str__(self):
+        return f"{self.organisation.title} {self.year} (archived)"
+
+    objects: models.Manager
+
+
+class BulkAuditEntry(models.Model):
+    """
+    Audit trail for set-based changes, one entry per affected set of rows.
+    Written by voteit_org.audit.record_bulk_audit
+    """
+
+    ACTION_CREATE = "create"
+    ACTION_UPDATE = "update"
+    ACTION_CHOICES = [
+        (ACTION_CREATE, "Create"),
+        (ACTION_UPDATE, "Update"),
+    ]
+
+    created: datetime = models.DateTimeField(
+        verbose_name="Created",
+        auto_now_add=True,
+    )
+    content_type: ContentType = models.ForeignKey(
+        ContentType,
+        verbose_name="Model",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    action: str = models.CharField(
+        verbose_name="Action",
+        max_length=10,
+        choices=ACTION_CHOICES,
+    )
+    object_ids: list = models.JSONField(
+        verbose_name="Object ids",
+        default=list,
+    )
+    fields: list = models.JSONField(
+        verbose_name="Changed fields",
+        default=list,
+    )
+    values: dict = models.JSONField(
+        verbose_name="New values",
+        default=dict,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        help_text="When all rows got the same values",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    source: str = models.CharField(
+        verbose_name="Source",
+        max_length=100,
+        default="",
+        blank=True,
+        help_text="Job, command or admin action",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                name="bulkaudit_type_created_idx",
+                fields=("content_type", "created"),
+            ),
+        ]
+        ordering = ["-created"]
+        verbose_name_plural = "Bulk audit entries"
+
+    def __str__(self):
+        return f"{self.source or self.action} {self.content_type} ({self.created})"
+
+    objects: models.Manager
@@ -0,0 +1,98 @@
+"""
+Async native variant of the contact-info endpoint, for ASGI deployments.
+
+Answers like ContactInfoViewSet list (GET) and change (PATCH) but runs on the
+event loop, using the async ORM and cache. Only session authentication is
+supported, and PATCH takes JSON. Include voteit_org.urls to serve it.
+"""
+
+from __future__ import annotations
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest
+from django.http import HttpResponseNotAllowed
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+
+from voteit.core import PERM
+from voteit.organisation.models import Organisation
+from voteit_org.cache import aget_contact_info_entry
+from voteit_org.cache import amake_contact_info_entry
+from voteit_org.models import ContactInfo
+from voteit_org.rest_api.serializers import ContactInfoSerializer
+
+
+def _error(status: int, detail: str) -> JsonResponse:
+    return JsonResponse({"detail": detail}, status=status)
+
+
+async def _has_perm(user, perm: str, obj) -> bool:
+    # Not ahas_perm, it skips backends without async support, such as rules
+    return await sync_to_async(user.has_perm)(perm, obj)
+
+
+async def _get_contact_info(user) -> ContactInfo | None:
+    try:
+        return await ContactInfo.objects.select_related("organisation").aget(
+            organisation_id=user.organisation_id
+        )
+    except ContactInfo.DoesNotExist:
+        return None
+
+
+async def contact_info(request: HttpRequest):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _error(401, "Authentication credentials were not provided.")
+    if request.method == "GET":
+        return await _get(request, user)
+    if request.method == "PATCH":
+        return await _patch(request, user)
+    return HttpResponseNotAllowed(["GET", "PATCH"])
+
+
+async def _get(request: HttpRequest, user):
+    entry = await aget_contact_info_entry(user.organisation_id)
+    if entry is None:
+        instance = await _get_contact_info(user)
+        if instance is None:
+            return _error(404, "Not found.")
+    else:
+        # Permission check only needs to know which organisation this is
+        organisation = await Organisation.objects.aget(pk=user.organisation_id)
+        instance = ContactInfo(pk=entry["pk"], organisation=organisation)
+    if not await _has_perm(user, ContactInfo.get_perm(PERM.VIEW), instance):
+        return _error(404, "Not found.")
+    if entry is None:
+        serializer = ContactInfoSerializer(instance)
+        entry = await amake_contact_info_entry(
+            user.organisation_id, instance.pk, dict(serializer.data)
+        )
+    response = get_conditional_response(request, etag=entry["etag"])
+    if response is None:
+        response = JsonResponse(entry["data"])
+    response["ETag"] = entry["etag"]
+    return response
+
+
+async def _patch(request: HttpRequest, user):
+    instance = await _get_contact_info(user)
+    if instance is None:
+        return _error(404, "Not found.")
+    if not await _has_perm(user, ContactInfo.get_perm(PERM.CHANGE), instance):
+        return _error(403, "You do not have permission to perform this action.")
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return _error(400, "JSON parse error.")
+    serializer = ContactInfoSerializer(
+        instance, data=data, partial=True, context={"request": request}
+    )
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    for name, value in serializer.validated_data.items():
+        setattr(instance, name, value)
+    await instance.asave()
+    return JsonResponse(ContactInfoSerializer(instance).data)
@@ -1,7 +1,12 @@
+from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
 from voteit.core.rest_api.utils import validate_model_add
 from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.models import MembershipSummary
+from voteit_org.models import OrganisationHealth
+from voteit_org.rest_api.utils import get_organisation
 
 
 class ContactInfoSerializer(ModelSerializer):
@@ -32,7 +37,65 @@ class CreateContactInfoSerializer(ContactInfoSerializer):
 
     def validate(self, attrs):
         attrs = super().validate(attrs)
-        user = self.context["request"].user
-        attrs["organisation"] = user.organisation
-        validate_model_add(self, ContactInfo, user.organisation)
+        organisation = get_organisation(self.context["request"])
+        attrs["organisation"] = organisation
+        validate_model_add(self, ContactInfo, organisation)
         return attrs
+
+
+class MembershipPaymentSerializer(serializers.Serializer):
+    organisation = serializers.IntegerField()
+    year = serializers.IntegerField(min_value=1000, max_value=9999)
+    paid = serializers.BooleanField()
+
+
+class MembershipSerializer(ModelSerializer):
+    organisation_title = serializers.CharField(source="organisation.title")
+    membership_type_title = serializers.CharField(source="membership_type.title")
+
+    class Meta:
+        model = Membership
+        fields = read_only_fields = (
+            "pk",
+            "organisation",
+            "organisation_title",
+            "year",
+            "membership_type",
+            "membership_type_title",
+            "paid",
+            "text",
+        )
+
+
+class MembershipSummarySerializer(ModelSerializer):
+    membership_type_title = serializers.CharField(source="membership_type.title")
+
+    class Meta:
+        model = MembershipSummary
+        fields = read_only_fields = (
+            "year",
+            "membership_type",
+            "membership_type_title",
+            "paid",
+            "count",
+            "total",
+        )
+
+
+class OrganisationHealthSerializer(ModelSerializer):
+    organisation_title = serializers.CharField(source="organisation.title")
+
+    class Meta:
+        model = OrganisationHealth
+        fields = read_only_fields = (
+            "organisation",
+            "organisation_title",
+            "active",
+            "has_contact_info",
+            "contact_complete",
+            "requires_check",
+            "contact_modified",
+            "latest_year",
+            "latest_paid",
+            "updated",
+        )
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import AsyncRequestFactory
+from django.test import TestCase
+
+from voteit.organisation.models import Organisation
+from voteit.organisation.roles import ROLE_ORG_MANAGER
+from voteit_org.models import ContactInfo
+from voteit_org.rest_api.async_views import contact_info
+
+
+def _request(user, method="get", data=None):
+    factory = AsyncRequestFactory()
+    if method == "patch":
+        request = factory.patch(
+            "/", data=json.dumps(data), content_type="application/json"
+        )
+    else:
+        request = factory.get("/")
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    return request
+
+
+class AsyncContactInfoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org: Organisation = Organisation.objects.create(
+            title="Test org", host="testserver"
+        )
+        cls.manager = cls.org.users.create(username="manager")
+        cls.user = cls.org.users.create(username="user")
+        cls.org.add_roles(cls.manager, ROLE_ORG_MANAGER)
+        cls.ci = ContactInfo.objects.create(
+            organisation=cls.org, invoice_email="bill@somehost.com"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_get(self):
+        response = await contact_info(_request(self.manager))
+        self.assertEqual(200, response.status_code)
+        data = json.loads(response.content)
+        self.assertEqual(self.ci.pk, data["pk"])
+        self.assertEqual("bill@somehost.com", data["invoice_email"])
+        self.assertTrue(response["ETag"])
+        # Cached
+        response = await contact_info(_request(self.manager))
+        self.assertEqual(data, json.loads(response.content))
+
+    async def test_rules_permission_without_async_backend(self):
+        # As with Django 5.2, where ahas_perm skips the rules backend
+        with mock.patch.object(
+            type(self.manager),
+            "ahas_perm",
+            mock.AsyncMock(return_value=False),
+            create=True,
+        ):
+            response = await contact_info(_request(self.manager))
+            self.assertEqual(200, response.status_code)
+            data = {"text": "Well hello"}
+            response = await contact_info(_request(self.manager, "patch", data))
+            self.assertEqual(200, response.status_code)
+
+    async def test_get_permissions(self):
+        response = await contact_info(_request(self.user))
+        self.assertEqual(404, response.status_code)
+        response = await contact_info(_request(AnonymousUser()))
+        self.assertEqual(401, response.status_code)
+
+    async def test_patch(self):
+        data = {"text": "Well hello"}
+        response = await contact_info(_request(self.manager, "patch", data))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("Well hello", json.loads(response.content)["text"])
+        await self.ci.arefresh_from_db()
+        self.assertEqual("Well hello", self.ci.text)
+
+    async def test_patch_permission(self):
+        response = await contact_info(_request(self.user, "patch", {"text": "No"}))
+        self.assertEqual(403, response.status_code)
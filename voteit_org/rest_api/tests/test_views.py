@@ -1,13 +1,29 @@
 from __future__ import annotations
+import re
+from collections import Counter
 from typing import TYPE_CHECKING
+from unittest import mock
+from unittest import skipUnless
 
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from rest_framework.test import APIRequestFactory
 from rest_framework.test import APITestCase
 
+from voteit.core import PERM
 from voteit.core.testing import run_permission_tests
 from voteit.organisation.models import Organisation
 from voteit.organisation.roles import ROLE_ORG_MANAGER
+from voteit_org.models import BulkAuditEntry
 from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.models import MembershipType
+from voteit_org.rest_api.pagination import YearKeysetPagination
+from voteit_org.rest_api.utils import get_contact_info
+from voteit_org.rest_api.utils import get_organisation
+from voteit_org.rest_api.utils import has_perm
 
 if TYPE_CHECKING:
     pass
@@ -23,6 +39,9 @@ class ContactInfoViewSetTests(APITestCase):
         cls.user = cls.org.users.create(username="user")
         cls.org.add_roles(cls.manager, ROLE_ORG_MANAGER)
 
+    def setUp(self):
+        cache.clear()
+
     def test_create(self):
         url = reverse("contact-info-list")
         data = {
@@ -88,3 +107,253 @@ class ContactInfoViewSetTests(APITestCase):
             ),
         ):
             func(*params)
+
+    def test_list_conditional(self):
+        ContactInfo.objects.create(
+            organisation=self.org,
+            invoice_email="bill@somehost.com",
+        )
+        url = reverse("contact-info-list")
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        etag = response["ETag"]
+        # Only the ETag, the data can change without touching modified
+        self.assertNotIn("Last-Modified", response)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+        )
+        self.assertEqual(200, response.status_code)
+        # Changes invalidate
+        response = self.client.patch(
+            reverse("contact-info-change"), {"text": "Changed"}, format="json"
+        )
+        self.assertEqual(200, response.status_code)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("Changed", response.data["text"])
+        self.assertNotEqual(etag, response["ETag"])
+
+    def test_list_cached_still_checks_permission(self):
+        ContactInfo.objects.create(organisation=self.org)
+        url = reverse("contact-info-list")
+        self.client.force_authenticate(user=self.manager)
+        self.assertEqual(200, self.client.get(url).status_code)
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(404, self.client.get(url).status_code)
+
+
+class ContactInfoQueryTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org: Organisation = Organisation.objects.create(
+            title="Test org", host="testserver"
+        )
+        cls.manager = cls.org.users.create(username="manager")
+        cls.org.add_roles(cls.manager, ROLE_ORG_MANAGER)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(user=self.manager)
+
+    def _selects_per_table(self, func) -> Counter:
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        counts = Counter()
+        for query in ctx.captured_queries:
+            if match := re.match(r'SELECT .*? FROM "?(\w+)"?', query["sql"]):
+                counts[match.group(1)] += 1
+        return counts
+
+    def _assert_at_most_once(self, counts: Counter):
+        role_table = Organisation._meta.get_field("roles").related_model._meta.db_table
+        self.assertLessEqual(counts[role_table], 1, counts)
+        self.assertLessEqual(counts[ContactInfo._meta.db_table], 1, counts)
+        self.assertLessEqual(counts[Organisation._meta.db_table], 1, counts)
+
+    def test_list(self):
+        ContactInfo.objects.create(organisation=self.org, invoice_email="a@b.se")
+        url = reverse("contact-info-list")
+        # Cold and cached
+        for _ in range(2):
+            counts = self._selects_per_table(lambda: self.client.get(url))
+            self._assert_at_most_once(counts)
+
+    def test_list_missing(self):
+        url = reverse("contact-info-list")
+        self._assert_at_most_once(self._selects_per_table(lambda: self.client.get(url)))
+
+    def test_change(self):
+        ContactInfo.objects.create(organisation=self.org, invoice_email="a@b.se")
+        url = reverse("contact-info-change")
+        counts = self._selects_per_table(
+            lambda: self.client.patch(url, {"text": "Hello"}, format="json")
+        )
+        # Saving refreshes organisation health, which reads organisations
+        counts[Organisation._meta.db_table] = 0
+        self._assert_at_most_once(counts)
+
+    def test_create(self):
+        url = reverse("contact-info-list")
+        counts = self._selects_per_table(
+            lambda: self.client.post(url, {"text": "Hello"}, format="json")
+        )
+        self.assertTrue(ContactInfo.objects.filter(organisation=self.org).exists())
+        counts[Organisation._meta.db_table] = 0
+        self._assert_at_most_once(counts)
+
+    def test_memoized_within_request(self):
+        ContactInfo.objects.create(organisation=self.org)
+        request = APIRequestFactory().get("/")
+        request.user = self.manager
+        perm = ContactInfo.get_perm(PERM.VIEW)
+        instance = get_contact_info(request)
+        self.assertTrue(has_perm(request, perm, instance))
+        with self.assertNumQueries(0):
+            self.assertIs(instance, get_contact_info(request))
+            self.assertIs(instance.organisation, get_organisation(request))
+            self.assertTrue(has_perm(request, perm, instance))
+
+
+class MembershipPaymentViewSetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org: Organisation = Organisation.objects.create(
+            title="Test org", host="testserver"
+        )
+        cls.other_org = Organisation.objects.create(title="Other", host="other")
+        cls.staff = cls.org.users.create(username="staff", is_staff=True)
+        cls.manager = cls.org.users.create(username="manager")
+        cls.org.add_roles(cls.manager, ROLE_ORG_MANAGER)
+        mem_type = MembershipType.objects.create(title="Basic", price=100)
+        cls.mem_2024 = Membership.objects.create(
+            organisation=cls.org, year=2024, membership_type=mem_type, paid=True
+        )
+        cls.mem_2025 = Membership.objects.create(
+            organisation=cls.org, year=2025, membership_type=mem_type
+        )
+        cls.other_2025 = Membership.objects.create(
+            organisation=cls.other_org, year=2025, membership_type=mem_type
+        )
+
+    def test_permission(self):
+        url = reverse("membership-payments-list")
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.post(url, [], format="json")
+        self.assertEqual(403, response.status_code)
+
+    def test_reconcile(self):
+        url = reverse("membership-payments-list")
+        self.client.force_authenticate(user=self.staff)
+        data = [
+            {"organisation": self.org.pk, "year": 2024, "paid": True},
+            {"organisation": self.org.pk, "year": 2025, "paid": True},
+            {"organisation": self.other_org.pk, "year": 2024, "paid": True},
+        ]
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            ["unchanged", "updated", "not_found"],
+            [x["status"] for x in response.data],
+        )
+        self.mem_2025.refresh_from_db()
+        self.assertTrue(self.mem_2025.paid)
+        self.other_2025.refresh_from_db()
+        self.assertFalse(self.other_2025.paid)
+        entry = BulkAuditEntry.objects.get()
+        self.assertEqual([self.mem_2025.pk], entry.object_ids)
+        self.assertEqual({"paid": True}, entry.values)
+        self.assertEqual(self.staff, entry.user)
+
+
+class MembershipViewSetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org: Organisation = Organisation.objects.create(
+            title="Test org", host="testserver"
+        )
+        cls.staff = cls.org.users.create(username="staff", is_staff=True)
+        cls.user = cls.org.users.create(username="user")
+        cls.mem_type = MembershipType.objects.create(title="Basic", price=100)
+        for year in (2023, 2024, 2025):
+            Membership.objects.create(
+                organisation=cls.org,
+                year=year,
+                membership_type=cls.mem_type,
+                paid=year != 2025,
+            )
+
+    def test_permission(self):
+        url = reverse("memberships-list")
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(403, self.client.get(url).status_code)
+
+    @mock.patch.object(YearKeysetPagination, "page_size", 2)
+    def test_list_pages(self):
+        url = reverse("memberships-list")
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([2025, 2024], [x["year"] for x in response.data["results"]])
+        self.assertEqual("Test org", response.data["results"][0]["organisation_title"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([2023], [x["year"] for x in response.data["results"]])
+        self.assertIsNone(response.data["next"])
+
+    def test_list_filters(self):
+        url = reverse("memberships-list")
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(url, {"paid": "false"})
+        self.assertEqual([2025], [x["year"] for x in response.data["results"]])
+        response = self.client.get(
+            url, {"year": "2023", "organisation__active": "true"}
+        )
+        self.assertEqual([2023], [x["year"] for x in response.data["results"]])
+        response = self.client.get(url, {"year": "nope"})
+        self.assertEqual(400, response.status_code)
+
+
+@skipUnless(connection.vendor == "postgresql", "Query plans need Postgres")
+class YearKeysetPaginationPlanTests(APITestCase):
+    def setUp(self):
+        # Tables are tiny in tests, make the planner pick indexes when it can
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def test_deep_page_is_index_range_scan(self):
+        pagination = YearKeysetPagination()
+        queryset = Membership.objects.order_by("-year", "-id")
+        plan = pagination.after_cursor(queryset, 2020, 5000)[:100].explain()
+        self.assertIn("membership_year_id_idx", plan)
+        self.assertRegex(plan, r"Index Cond: \(.*year <= 2020")
+
+
+class OrganisationHealthViewSetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org: Organisation = Organisation.objects.create(
+            title="Test org", host="testserver"
+        )
+        cls.other_org = Organisation.objects.create(title="Other", host="other")
+        cls.staff = cls.org.users.create(username="staff", is_staff=True)
+        mem_type = MembershipType.objects.create(title="Basic", price=100)
+        Membership.objects.create(
+            organisation=cls.org, year=2025, membership_type=mem_type, paid=True
+        )
+        Membership.objects.create(
+            organisation=cls.other_org, year=2025, membership_type=mem_type
+        )
+
+    def test_unpaid_filter(self):
+        url = reverse("organisation-health-list")
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(url, {"unpaid": 2025, "active": "true"})
+        self.assertEqual(200, response.status_code)
+        results = response.data.get("results", response.data)
+        self.assertEqual(["Other"], [x["organisation_title"] for x in results])
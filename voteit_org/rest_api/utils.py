@@ -0,0 +1,57 @@
+"""
+Request scoped memoization for the REST layer. Values are stored on the request,
+so nothing outlives it and nothing needs to be invalidated.
+"""
+
+from __future__ import annotations
+
+from voteit.organisation.models import Organisation
+from voteit_org.models import ContactInfo
+
+_CACHE_ATTR = "_voteit_org_cache"
+
+
+def request_cache(request) -> dict:
+    try:
+        return getattr(request, _CACHE_ATTR)
+    except AttributeError:
+        cache = {}
+        setattr(request, _CACHE_ATTR, cache)
+        return cache
+
+
+def get_organisation(request) -> Organisation | None:
+    cache = request_cache(request)
+    if "organisation" not in cache:
+        cache["organisation"] = request.user.organisation
+    return cache["organisation"]
+
+
+def get_contact_info(request) -> ContactInfo | None:
+    """
+    Contact info of the user's organisation, also remembered when there is none.
+    """
+    cache = request_cache(request)
+    if "contact_info" not in cache:
+        organisation = get_organisation(request)
+        instance = ContactInfo.objects.filter(organisation=organisation).first()
+        if instance is not None:
+            # Share the organisation, so rules predicates don't load it again
+            instance.organisation = organisation
+        cache["contact_info"] = instance
+    return cache["contact_info"]
+
+
+def set_contact_info(request, instance: ContactInfo):
+    request_cache(request)["contact_info"] = instance
+
+
+def has_perm(request, perm: str, obj=None) -> bool:
+    """
+    request.user.has_perm, evaluated once per permission and object.
+    """
+    key = (perm, None if obj is None else (obj._meta.label, obj.pk))
+    results = request_cache(request).setdefault("perms", {})
+    if key not in results:
+        results[key] = request.user.has_perm(perm, obj)
+    return results[key]
@@ -1,18 +1,40 @@
 from __future__ import annotations
 
-from django.core.exceptions import ObjectDoesNotExist
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils.cache import get_conditional_response
+from django.utils.timezone import now
 from rest_framework import mixins
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
+from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from voteit.core import PERM
 from voteit.core.rest_api import router
 from voteit.core.rest_api.mixins import VerboseAutoPermissionViewSetMixin
+from voteit_org.cache import get_contact_info_entry
+from voteit_org.cache import make_contact_info_entry
+from voteit_org.memberships import reconcile_payments
 from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.models import MembershipSummary
+from voteit_org.models import OrganisationHealth
 from voteit_org.rest_api.serializers import ContactInfoSerializer
 from voteit_org.rest_api.serializers import CreateContactInfoSerializer
+from voteit_org.rest_api.pagination import YearKeysetPagination
+from voteit_org.rest_api.serializers import MembershipPaymentSerializer
+from voteit_org.rest_api.serializers import MembershipSerializer
+from voteit_org.rest_api.serializers import MembershipSummarySerializer
+from voteit_org.rest_api.serializers import OrganisationHealthSerializer
+from voteit_org.rest_api.utils import get_contact_info
+from voteit_org.rest_api.utils import get_organisation
+from voteit_org.rest_api.utils import has_perm
+from voteit_org.rest_api.utils import set_contact_info
 
 
 @router.register("contact-info", basename="contact-info")
@@ -31,10 +53,11 @@ class ContactInfoViewSet(
     }
 
     def get_object(self):
-        try:
-            return self.request.user.organisation.contact_info
-        except ObjectDoesNotExist:
+        # Memoized, permission checks and actions may ask more than once
+        instance = get_contact_info(self.request)
+        if instance is None:
             raise NotFound()
+        return instance
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -44,12 +67,34 @@ class ContactInfoViewSet(
     def list(self, request, *args, **kwargs):
         """
         A list that may contain one item, but no more.
+
+        The serialized data is cached per organisation, and conditional requests
+        are answered with 304 without loading the contact info.
         """
-        instance = self.get_object()
-        if not self.request.user.has_perm(ContactInfo.get_perm(PERM.VIEW), instance):
+        organisation_id = request.user.organisation_id
+        entry = get_contact_info_entry(organisation_id)
+        if entry is None:
+            instance = self.get_object()
+        else:
+            # Permission check only needs to know which organisation this is
+            instance = ContactInfo(
+                pk=entry["pk"], organisation=get_organisation(request)
+            )
+        if not has_perm(request, ContactInfo.get_perm(PERM.VIEW), instance):
             raise NotFound()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        if entry is None:
+            serializer = self.get_serializer(instance)
+            entry = make_contact_info_entry(
+                organisation_id, instance.pk, dict(serializer.data)
+            )
+        response = get_conditional_response(request, etag=entry["etag"])
+        if response is None:
+            response = Response(entry["data"])
+        response["ETag"] = entry["etag"]
+        return response
+
+    def perform_create(self, serializer):
+        set_contact_info(self.request, serializer.save())
 
     @action(detail=False, methods=["patch"])
     def change(self, request, *args, **kwargs):
@@ -62,3 +107,123 @@ class ContactInfoViewSet(
             # forcibly invalidate the prefetch cache on the instance.
             instance._prefetched_objects_cache = {}
         return Response(serializer.data)
+
+
+@router.register("membership-payments", basename="membership-payments")
+class MembershipPaymentViewSet(GenericViewSet):
+    """
+    Staff only, for reconciling payments from for instance a bank export.
+    """
+
+    queryset = Membership.objects.none()
+    serializer_class = MembershipPaymentSerializer
+    permission_classes = [IsAdminUser]
+
+    def create(self, request, *args, **kwargs):
+        """
+        Takes a list of organisation, year and paid.
+        Returns the same list with a status for each row.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            reconcile_payments(serializer.validated_data, user=request.user)
+        )
+
+
+def _bool_param(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+@router.register("memberships", basename="memberships")
+class MembershipViewSet(ReadOnlyModelViewSet):
+    """
+    Staff only. Filter with year, paid, membership_type and organisation__active.
+    """
+
+    serializer_class = MembershipSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = YearKeysetPagination
+    int_filters = {
+        "year": "year",
+        "membership_type": "membership_type_id",
+    }
+    bool_filters = {
+        "paid": "paid",
+        "organisation__active": "organisation__active",
+    }
+
+    def get_queryset(self):
+        queryset = Membership.objects.select_related("organisation", "membership_type")
+        params = self.request.query_params
+        filters = {}
+        for param, lookup in self.int_filters.items():
+            if value := params.get(param):
+                try:
+                    filters[lookup] = int(value)
+                except ValueError:
+                    raise ValidationError({param: "Must be an integer"})
+        for param, lookup in self.bool_filters.items():
+            if value := params.get(param):
+                filters[lookup] = _bool_param(value)
+        return queryset.filter(**filters)
+
+
+@router.register("membership-summary", basename="membership-summary")
+class MembershipSummaryViewSet(mixins.ListModelMixin, GenericViewSet):
+    """
+    Staff only. Counts and price totals per year, membership type and paid status.
+    Filter with year.
+    """
+
+    serializer_class = MembershipSummarySerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = None
+
+    def get_queryset(self):
+        queryset = MembershipSummary.objects.select_related("membership_type")
+        if year := self.request.query_params.get("year"):
+            try:
+                queryset = queryset.filter(year=int(year))
+            except ValueError:
+                raise ValidationError({"year": "Must be an integer"})
+        return queryset
+
+
+@router.register("organisation-health", basename="organisation-health")
+class OrganisationHealthViewSet(ReadOnlyModelViewSet):
+    """
+    Staff only. Filters:
+
+    active, requires_check, contact_complete
+        true or false
+    unpaid
+        Year, organisations whose latest membership isn't a paid one for that year
+    stale
+        true for contact info that requires check or is older than a year
+    """
+
+    serializer_class = OrganisationHealthSerializer
+    permission_classes = [IsAdminUser]
+    bool_filters = ("active", "requires_check", "contact_complete")
+
+    def get_queryset(self):
+        queryset = OrganisationHealth.objects.select_related("organisation").order_by(
+            "organisation__title"
+        )
+        params = self.request.query_params
+        for name in self.bool_filters:
+            if value := params.get(name):
+                queryset = queryset.filter(**{name: _bool_param(value)})
+        if value := params.get("unpaid"):
+            try:
+                year = int(value)
+            except ValueError:
+                raise ValidationError({"unpaid": "Must be a year"})
+            queryset = queryset.exclude(latest_year=year, latest_paid=True)
+        if value := params.get("stale"):
+            stale = Q(requires_check=True) | Q(
+                contact_modified__lt=now() - timedelta(days=365)
+            )
+            queryset = queryset.filter(stale if _bool_param(value) else ~stale)
+        return queryset
@@ -0,0 +1,100 @@
+"""
+Cached HTML sanitizing for rich text fields.
+
+Sanitizing parses the whole fragment, which is the expensive part of saving
+contact info with a large pasted invoice address. Cleaned fragments are kept
+in a bounded cache keyed by a digest of the raw value. Models mark values they
+loaded from the database as clean, so saves where a field didn't change skip
+the parser even in a process that never saw the value before.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Iterable
+from threading import Lock
+
+from voteit.core.utils import relaxed_clean_html
+
+# Cleaned fragments to keep per process
+HTML_CLEAN_CACHE_SIZE = 1024
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.blake2b(value.encode(), digest_size=16).digest()
+
+
+class CachedHTMLCleaner:
+    """
+    Wraps an HTML cleaner with a least recently used cache of cleaned fragments.
+    Cleaned output is cached as its own result too, since cleaning is idempotent.
+    """
+
+    def __init__(
+        self, cleaner: Callable[[str], str], maxsize: int = HTML_CLEAN_CACHE_SIZE
+    ):
+        self.cleaner = cleaner
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[bytes, str] = OrderedDict()
+        self._lock = Lock()
+
+    def __call__(self, value: str) -> str:
+        if not value:
+            return value
+        key = _digest(value)
+        with self._lock:
+            if (cleaned := self._cache.get(key)) is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cleaned
+            self.misses += 1
+        cleaned = self.cleaner(value)
+        with self._lock:
+            self._store(key, cleaned)
+            if cleaned != value:
+                self._store(_digest(cleaned), cleaned)
+        return cleaned
+
+    def _store(self, key: bytes, cleaned: str):
+        self._cache[key] = cleaned
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def mark_clean(self, value: str):
+        """
+        Cache value as its own result. Only for values known to be cleaned
+        already, such as rich text loaded from the database.
+        """
+        if value:
+            with self._lock:
+                self._store(_digest(value), value)
+
+    def clean_many(self, values: Iterable[str]) -> dict[str, str]:
+        """
+        Clean a batch, each distinct value once. Returns raw value -> cleaned.
+        Results aren't added to the cache, so a large import doesn't push out
+        the fragments that single saves keep hitting.
+        """
+        result = {}
+        for value in set(values):
+            cleaned = None
+            if value:
+                with self._lock:
+                    cleaned = self._cache.get(_digest(value))
+            if cleaned is None:
+                cleaned = self.cleaner(value) if value else value
+            result[value] = cleaned
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+cached_relaxed_clean_html = CachedHTMLCleaner(relaxed_clean_html)
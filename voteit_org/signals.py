@@ -0,0 +1,74 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_init
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from voteit.organisation.models import Organisation
+from voteit_org.cache import invalidate_contact_info
+from voteit_org.health import refresh_organisation_health
+from voteit_org.memberships import apply_membership_summary_deltas
+from voteit_org.memberships import refresh_membership_summary
+from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.models import MembershipType
+
+
+@receiver(post_save, sender=ContactInfo)
+@receiver(post_delete, sender=ContactInfo)
+def contact_info_changed(instance: ContactInfo, **kwargs):
+    invalidate_contact_info(instance.organisation_id)
+    refresh_organisation_health([instance.organisation_id])
+
+
+def _summary_key(instance: Membership) -> tuple[int, int, bool] | None:
+    # Avoid loading deferred fields
+    values = instance.__dict__
+    key = (values.get("year"), values.get("membership_type_id"), values.get("paid"))
+    return None if None in key else key
+
+
+@receiver(post_init, sender=Membership)
+def membership_loaded(instance: Membership, **kwargs):
+    instance._loaded_summary_key = _summary_key(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Membership)
+def membership_saved(instance: Membership, created: bool, **kwargs):
+    previous = None if created else instance._loaded_summary_key
+    current = _summary_key(instance)
+    if not created and previous is None:
+        # Loaded with deferred fields, so we don't know what it was
+        refresh_membership_summary({instance.year})
+    elif previous != current:
+        deltas = Counter({current: 1})
+        if previous is not None:
+            deltas[previous] -= 1
+        apply_membership_summary_deltas(deltas)
+    instance._loaded_summary_key = current
+    refresh_organisation_health([instance.organisation_id])
+
+
+@receiver(post_delete, sender=Membership)
+def membership_deleted(instance: Membership, **kwargs):
+    if key := instance._loaded_summary_key or _summary_key(instance):
+        apply_membership_summary_deltas({key: -1})
+    refresh_organisation_health([instance.organisation_id])
+
+
+@receiver(post_save, sender=MembershipType)
+def membership_type_changed(instance: MembershipType, created: bool, **kwargs):
+    if not created:
+        # Price may have changed
+        refresh_membership_summary(
+            Membership.objects.filter(membership_type=instance)
+            .order_by()
+            .values_list("year", flat=True)
+            .distinct()
+        )
+
+
+@receiver(post_save, sender=Organisation)
+def organisation_changed(instance: Organisation, **kwargs):
+    refresh_organisation_health([instance.pk])
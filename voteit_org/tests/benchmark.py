@@ -0,0 +1,363 @@
+"""
+Benchmarks for the hot paths in voteit_org, run against generated data.
+
+Use the benchmark_org management command, it sets up a throwaway test database
+on whatever database the settings point to, so SQLite works offline and a
+local Postgres gives numbers closer to production. Lives with the tests, so
+it's only available in a checkout and not in the installed package.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from dataclasses import asdict
+from dataclasses import dataclass
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from voteit.organisation.models import Organisation
+from voteit.organisation.roles import ROLE_ORG_MANAGER
+from voteit_org import jobs
+from voteit_org.health import refresh_organisation_health
+from voteit_org.memberships import refresh_membership_summary
+from voteit_org.metrics import JobMetrics
+from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.models import MembershipType
+from voteit_org.sanitize import cached_relaxed_clean_html
+
+# Host of the first organisation, the one that the test client talks to
+BENCHMARK_HOST = "testserver"
+# Allowed relative slowdown against a baseline before it counts as a regression
+BENCHMARK_TOLERANCE = 0.25
+# Every Nth organisation is inactive, has stale contact info or lacks an email
+INACTIVE_EVERY = 10
+STALE_EVERY = 5
+MISSING_EMAIL_EVERY = 20
+# A large pasted invoice address, for the cost of sanitizing rich text on save
+LARGE_INVOICE_INFO = (
+    "<p>"
+    + "".join(
+        f'<span style="font-family: Calibri">Fakturaadress rad {i}</span><br>'
+        for i in range(2000)
+    )
+    + "</p>"
+)
+
+
+@dataclass
+class BenchmarkData:
+    organisations: int
+    admin: object
+    manager: object
+    membership_type: MembershipType
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    wall_time: float
+    query_count: int
+    query_time: float
+
+
+def generate_data(
+    organisations: int, years: int = 3, managers: int = 1, batch_size: int = 1000
+) -> BenchmarkData:
+    """
+    Create organisations with contact info, managers and memberships for the
+    given number of years back, all paid except the current one.
+    """
+    current_year = now().year
+    orgs = Organisation.objects.bulk_create(
+        [
+            Organisation(
+                title=f"Benchmark org {i}",
+                host=BENCHMARK_HOST if i == 0 else f"org{i}.benchmark.invalid",
+                active=i % INACTIVE_EVERY != INACTIVE_EVERY - 1,
+            )
+            for i in range(organisations)
+        ],
+        batch_size=batch_size,
+    )
+    User = get_user_model()
+    org_field = Organisation._meta.get_field("users").field.name
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f"manager-{i}-{j}",
+                first_name="Manager",
+                last_name=f"{i}-{j}",
+                email=f"manager{j}@org{i}.benchmark.invalid",
+                **{org_field: org},
+            )
+            for i, org in enumerate(orgs)
+            for j in range(managers)
+        ],
+        batch_size=batch_size,
+    )
+    roles = Organisation._meta.get_field("roles")
+    role_model = roles.related_model
+    if users:
+        # One through the API for the stored format, the rest in bulk
+        orgs[0].add_roles(users[0], ROLE_ORG_MANAGER)
+        assigned = role_model.objects.get(user=users[0]).assigned
+        role_model.objects.bulk_create(
+            [
+                role_model(**{roles.field.name: org}, user=user, assigned=assigned)
+                for i, org in enumerate(orgs)
+                for user in users[i * managers : (i + 1) * managers]
+                if user != users[0]
+            ],
+            batch_size=batch_size,
+        )
+    admin = User.objects.create(
+        username="benchmark-admin",
+        is_staff=True,
+        is_superuser=True,
+        **{org_field: orgs[0]},
+    )
+    ContactInfo.objects.bulk_create(
+        [
+            ContactInfo(
+                organisation=org,
+                text=f"<p>Kontakt för <strong>{org.title}</strong></p>",
+                generic_email=f"info@org{i}.benchmark.invalid",
+                invoice_email=(
+                    ""
+                    if i % MISSING_EMAIL_EVERY == 0
+                    else f"faktura@org{i}.benchmark.invalid"
+                ),
+                invoice_info="<p>Box 1<br>123 45 Staden</p>",
+                requires_check=i % MISSING_EMAIL_EVERY == 0,
+            )
+            for i, org in enumerate(orgs)
+        ],
+        batch_size=batch_size,
+    )
+    stale = [org.pk for i, org in enumerate(orgs) if i % STALE_EVERY == 0]
+    for i in range(0, len(stale), batch_size):
+        ContactInfo.objects.filter(organisation__in=stale[i : i + batch_size]).update(
+            modified=now() - jobs.STALE_AFTER - timedelta(days=1)
+        )
+    membership_type = MembershipType.objects.create(title="Benchmark", price=100)
+    Membership.objects.bulk_create(
+        [
+            Membership(
+                organisation=org,
+                year=year,
+                membership_type=membership_type,
+                paid=year < current_year,
+            )
+            for org in orgs
+            for year in range(current_year - years + 1, current_year + 1)
+        ],
+        batch_size=batch_size,
+    )
+    refresh_membership_summary()
+    refresh_organisation_health(batch_size=batch_size)
+    return BenchmarkData(
+        organisations=organisations,
+        admin=admin,
+        manager=users[0] if users else admin,
+        membership_type=membership_type,
+    )
+
+
+def measure(name: str, func: Callable[[], object]) -> BenchmarkResult:
+    metrics = JobMetrics(name=name, started=now())
+    started = perf_counter()
+    with connection.execute_wrapper(metrics):
+        func()
+    return BenchmarkResult(
+        name=name,
+        wall_time=perf_counter() - started,
+        query_count=metrics.query_count,
+        query_time=metrics.query_time,
+    )
+
+
+def _get(client: Client, url: str, data=None):
+    response = client.get(url, data)
+    assert response.status_code == 200, f"{url}: {response.status_code}"
+    return response
+
+
+def _download_contacts_csv(client: Client):
+    response = client.post(
+        reverse("admin:voteit_org_contactinfo_changelist"),
+        {
+            "action": "download_contacts_csv",
+            "select_across": "1",
+            "index": "0",
+            "_selected_action": list(
+                ContactInfo.objects.values_list("pk", flat=True)[:1]
+            ),
+        },
+    )
+    assert response.status_code == 200, f"CSV: {response.status_code}"
+    return b"".join(response.streaming_content)
+
+
+def _save_contact(instance: ContactInfo, **values):
+    for name, value in values.items():
+        setattr(instance, name, value)
+    instance.save()
+
+
+def _render_org_check_emails(renders: int = 10_000):
+    # Distinct organisations, so every call renders instead of hitting the cache
+    jobs._render_org_check.cache_clear()
+    contacts = [
+        ContactInfo(
+            organisation=Organisation(title=f"Org {i}", host=f"org{i}.voteit.se")
+        )
+        for i in range(renders)
+    ]
+    managers = {"Someone Managerly", "Another Person"}
+    for contact in contacts:
+        jobs.render_org_check_parts(contact, managers)
+
+
+def _enqueue_inline(**kwargs):
+    return jobs.email_orgs_about_check(**kwargs)
+
+
+def run_benchmarks(data: BenchmarkData) -> list[BenchmarkResult]:
+    """
+    Time each hot path once. Jobs change data, so they run in an order
+    where each one has something to do.
+    """
+    next_year = str(now().year + 1)
+    admin_client = Client()
+    admin_client.force_login(data.admin)
+    manager_client = Client()
+    manager_client.force_login(data.manager)
+    results = [
+        measure(
+            "create_memberships",
+            lambda: call_command(
+                "create_memberships",
+                next_year,
+                "--mem",
+                str(data.membership_type.pk),
+                "--commit",
+                stdout=StringIO(),
+            ),
+        ),
+        measure("org_might_require_check", lambda: jobs.org_might_require_check()),
+    ]
+    # Mailer chunks run inline instead of on the queue, through the test
+    # environment's locmem backend and without throttling.
+    with (
+        mock.patch.object(
+            jobs.email_orgs_about_check, "enqueue", side_effect=_enqueue_inline
+        ),
+        override_settings(VOTEIT_ORG_MAIL_RATE=1_000_000),
+    ):
+        results.append(
+            measure("contact_org_about_check", lambda: jobs.contact_org_about_check())
+        )
+    # No queries, only template rendering
+    results.append(measure("render_org_check_parts", _render_org_check_emails))
+    contact_changelist = reverse("admin:voteit_org_contactinfo_changelist")
+    membership_changelist = reverse("admin:voteit_org_membership_changelist")
+    contact_info_url = reverse("contact-info-list")
+    cache.clear()
+    results += [
+        measure("download_contacts_csv", lambda: _download_contacts_csv(admin_client)),
+        measure(
+            "admin_contactinfo_changelist",
+            lambda: _get(admin_client, contact_changelist),
+        ),
+        measure(
+            "admin_contactinfo_changelist_year",
+            lambda: _get(
+                admin_client, contact_changelist, {"membership_year": next_year}
+            ),
+        ),
+        measure(
+            "admin_membership_changelist",
+            lambda: _get(admin_client, membership_changelist, {"year": next_year}),
+        ),
+        measure("contact_info_api", lambda: _get(manager_client, contact_info_url)),
+        measure(
+            "contact_info_api_cached", lambda: _get(manager_client, contact_info_url)
+        ),
+    ]
+    contact = ContactInfo.objects.get(organisation__host=BENCHMARK_HOST)
+    cached_relaxed_clean_html.clear()
+    results.append(
+        measure(
+            "contact_save_large_html",
+            lambda: _save_contact(contact, invoice_info=LARGE_INVOICE_INFO),
+        )
+    )
+    # Loaded again with nothing cached, as in another worker. Only an email
+    # changed, so the invoice address isn't parsed again.
+    contact = ContactInfo.objects.get(pk=contact.pk)
+    cached_relaxed_clean_html.clear()
+    results.append(
+        measure(
+            "contact_save_large_html_unchanged",
+            lambda: _save_contact(contact, generic_email="ny@benchmark.invalid"),
+        )
+    )
+    return results
+
+
+def save_results(path, results: list[BenchmarkResult], organisations: int):
+    Path(path).write_text(
+        json.dumps(
+            {
+                "vendor": connection.vendor,
+                "organisations": organisations,
+                "created": now().isoformat(),
+                "results": {x.name: asdict(x) for x in results},
+            },
+            indent=2,
+        )
+    )
+
+
+def load_baseline(path) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def compare(
+    baseline: dict,
+    results: list[BenchmarkResult],
+    tolerance: float = BENCHMARK_TOLERANCE,
+) -> list[str]:
+    """
+    Regressions against a baseline, as readable lines. More queries than
+    before is always a regression, wall time only beyond the tolerance.
+    """
+    regressions = []
+    previous = baseline.get("results", {})
+    for result in results:
+        if (before := previous.get(result.name)) is None:
+            continue
+        if result.query_count > before["query_count"]:
+            regressions.append(
+                f"{result.name}: {before['query_count']} -> "
+                f"{result.query_count} queries"
+            )
+        if result.wall_time > before["wall_time"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: {before['wall_time']:.3f}s -> {result.wall_time:.3f}s"
+            )
+    return regressions
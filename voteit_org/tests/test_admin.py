@@ -0,0 +1,100 @@
+from unittest import skipUnless
+
+from django.contrib.admin import site
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from voteit.organisation.models import Organisation
+from voteit_org.admin import ContactInfoAdmin
+from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.models import MembershipType
+
+
+class ChangelistQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organisation.objects.create(title="Admin org", host="testserver")
+        cls.admin = cls.org.users.create(
+            username="admin", is_staff=True, is_superuser=True
+        )
+        cls.mem_type = MembershipType.objects.create(title="Basic", price=100)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _create(self, start: int, stop: int):
+        for i in range(start, stop):
+            org = Organisation.objects.create(title=f"Org {i}", host=f"org{i}")
+            ContactInfo.objects.create(organisation=org)
+            for year in (2024, 2025):
+                Membership.objects.create(
+                    organisation=org, year=year, membership_type=self.mem_type
+                )
+
+    def _count_queries(self, url: str, expected_rows: int) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(expected_rows, len(response.context["cl"].result_list))
+        return len(ctx)
+
+    def _assert_fixed_queries(self, url: str, per_org: int):
+        self._create(0, 10)
+        small = self._count_queries(url, 10 * per_org)
+        self._create(10, 100)
+        self.assertEqual(small, self._count_queries(url, 100 * per_org))
+
+    def test_contact_info(self):
+        url = reverse("admin:voteit_org_contactinfo_changelist")
+        self._assert_fixed_queries(url, 1)
+
+    def test_contact_info_membership_year_filter(self):
+        url = reverse("admin:voteit_org_contactinfo_changelist")
+        self._assert_fixed_queries(url + "?membership_year=2025", 1)
+
+    def test_membership(self):
+        url = reverse("admin:voteit_org_membership_changelist") + "?year=2025"
+        self._assert_fixed_queries(url, 1)
+
+
+class TrigramSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.by_title = ContactInfo.objects.create(
+            organisation=Organisation.objects.create(title="Kontaktklubben", host="a")
+        )
+        cls.by_text = ContactInfo.objects.create(
+            organisation=Organisation.objects.create(title="Other", host="b"),
+            text="<p>Ring kontakt@b.se</p>",
+        )
+        ContactInfo.objects.create(
+            organisation=Organisation.objects.create(title="Nope", host="c")
+        )
+
+    def _search(self, search_term: str) -> QuerySet:
+        model_admin = ContactInfoAdmin(ContactInfo, site)
+        queryset, may_have_duplicates = model_admin.get_search_results(
+            None, ContactInfo.objects.all(), search_term
+        )
+        self.assertFalse(may_have_duplicates)
+        return queryset
+
+    def test_title_or_text(self):
+        self.assertEqual({self.by_title, self.by_text}, set(self._search("KONTAKT")))
+        self.assertEqual([self.by_text], list(self._search('kontakt "ring"')))
+
+    @skipUnless(connection.vendor == "postgresql", "Query plans need Postgres")
+    def test_uses_trigram_indexes(self):
+        with connection.cursor() as cursor:
+            # Tables are tiny in tests, make the planner pick indexes when it can
+            cursor.execute("SET enable_seqscan = off")
+            try:
+                plan = self._search("kontakt").explain()
+            finally:
+                cursor.execute("RESET enable_seqscan")
+        self.assertIn("voteit_org_ci_text_trgm", plan)
+        self.assertIn("voteit_org_org_title_trgm", plan)
@@ -0,0 +1,196 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from unittest import skipUnless
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+from envelope.testing import testing_channel_layers_setting
+
+from voteit.organisation.models import Organisation
+from voteit_org.audit import AUDIT_CHUNK_SIZE
+from voteit_org.audit import audited_update
+from voteit_org.audit import bulk_audit_entries
+from voteit_org.audit import record_bulk_audit
+from voteit_org.contacts import import_contacts
+from voteit_org.jobs import STALE_AFTER
+from voteit_org.jobs import org_might_require_check
+from voteit_org.models import BulkAuditEntry
+from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.models import MembershipType
+
+
+@override_settings(CHANNEL_LAYERS=testing_channel_layers_setting)
+class BulkAuditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organisation.objects.create(title="Org", host="testserver")
+        cls.admin = cls.org.users.create(
+            username="admin", is_staff=True, is_superuser=True
+        )
+        cls.mem_type = MembershipType.objects.create(title="Basic", price=100)
+        cls.memberships = [
+            Membership.objects.create(
+                organisation=cls.org, year=year, membership_type=cls.mem_type
+            )
+            for year in (2024, 2025)
+        ]
+
+    def test_chunked_in_one_insert(self):
+        entries = bulk_audit_entries(
+            Membership, range(AUDIT_CHUNK_SIZE + 1), ["paid"], {"paid": True}
+        )
+        self.assertEqual(2, len(entries))
+        with self.assertNumQueries(1):
+            record_bulk_audit(entries)
+        self.assertEqual(
+            [[AUDIT_CHUNK_SIZE]],
+            [x.object_ids for x in BulkAuditEntry.objects.filter(id=entries[1].pk)],
+        )
+
+    def test_nothing_to_record(self):
+        with self.assertNumQueries(0):
+            record_bulk_audit(bulk_audit_entries(Membership, [], ["paid"]))
+
+    def test_audited_update(self):
+        qs = Membership.objects.filter(year=2025)
+        self.assertEqual(
+            {self.memberships[1].pk: (2025,)},
+            audited_update(qs, {"paid": True}, fields=["year"], source="test"),
+        )
+        self.assertTrue(Membership.objects.get(pk=self.memberships[1].pk).paid)
+        entry = BulkAuditEntry.objects.get()
+        self.assertEqual([self.memberships[1].pk], entry.object_ids)
+        self.assertEqual(["paid"], entry.fields)
+        self.assertEqual("test", entry.source)
+
+    @skipUnless(connection.vendor == "postgresql", "Needs UPDATE ... RETURNING")
+    def test_audited_update_single_statement(self):
+        ContentType.objects.get_for_model(Membership)
+        with CaptureQueriesContext(connection) as ctx:
+            updated = audited_update(Membership.objects.all(), {"paid": True})
+        self.assertEqual({x.pk for x in self.memberships}, set(updated))
+        # No pk lists sent back and forth, the update returns them
+        sqls = [x["sql"] for x in ctx.captured_queries]
+        self.assertEqual([], [x for x in sqls if x.startswith("SELECT")])
+        self.assertIn("RETURNING", [x for x in sqls if x.startswith("UPDATE")][0])
+
+    @skipUnless(connection.vendor != "postgresql", "Postgres doesn't batch")
+    def test_audited_update_batched_pks(self):
+        with mock.patch.object(connection.ops, "bulk_batch_size", return_value=1):
+            with CaptureQueriesContext(connection) as ctx:
+                updated = audited_update(Membership.objects.all(), {"paid": True})
+        self.assertEqual({x.pk for x in self.memberships}, set(updated))
+        updates = [x for x in ctx.captured_queries if x["sql"].startswith("UPDATE")]
+        self.assertEqual(2, len(updates))
+        self.assertEqual(2, Membership.objects.filter(paid=True).count())
+
+    def test_mark_as_paid(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:voteit_org_membership_changelist"),
+            {
+                "action": "mark_as_paid",
+                "_selected_action": [x.pk for x in self.memberships],
+            },
+        )
+        self.assertEqual(302, response.status_code)
+        entry = BulkAuditEntry.objects.get()
+        self.assertEqual(sorted(x.pk for x in self.memberships), entry.object_ids)
+        self.assertEqual(self.admin, entry.user)
+        self.assertEqual("mark_as_paid", entry.source)
+
+    def test_org_might_require_check(self):
+        for batch_size in (None, 1):
+            with self.subTest(batch_size=batch_size):
+                BulkAuditEntry.objects.all().delete()
+                contact = ContactInfo.objects.create(
+                    organisation=Organisation.objects.create(
+                        title=f"Stale {batch_size}", host=f"stale{batch_size}"
+                    ),
+                    generic_email="info@stale.se",
+                    invoice_email="faktura@stale.se",
+                )
+                ContactInfo.objects.filter(pk=contact.pk).update(
+                    modified=now() - STALE_AFTER - timedelta(days=1)
+                )
+                org_might_require_check(batch_size=batch_size, full=True)
+                entry = BulkAuditEntry.objects.get()
+                self.assertEqual([contact.pk], entry.object_ids)
+                self.assertEqual({"requires_check": True}, entry.values)
+
+    def test_create_memberships(self):
+        call_command(
+            "create_memberships",
+            "2026",
+            "--mem",
+            str(self.mem_type.pk),
+            "--commit",
+            stdout=StringIO(),
+        )
+        entry = BulkAuditEntry.objects.get()
+        self.assertEqual(BulkAuditEntry.ACTION_CREATE, entry.action)
+        self.assertEqual(
+            list(Membership.objects.filter(year=2026).values_list("pk", flat=True)),
+            entry.object_ids,
+        )
+
+    def test_create_memberships_concurrent_insert(self):
+        other = Organisation.objects.create(title="Other", host="other", active=False)
+        bulk_create = Membership.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # Committed by someone else while the command runs
+            self.racing = Membership.objects.create(
+                organisation=other, year=2026, membership_type=self.mem_type
+            )
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(
+            Membership.objects, "bulk_create", side_effect=racing_bulk_create
+        ):
+            call_command(
+                "create_memberships",
+                "2026",
+                "--mem",
+                str(self.mem_type.pk),
+                "--commit",
+                stdout=StringIO(),
+            )
+        entry = BulkAuditEntry.objects.get()
+        self.assertEqual(
+            [Membership.objects.get(organisation=self.org, year=2026).pk],
+            entry.object_ids,
+        )
+        self.assertNotIn(self.racing.pk, entry.object_ids)
+
+    def test_mark_as_paid_only_changed(self):
+        Membership.objects.filter(pk=self.memberships[0].pk).update(paid=True)
+        self.client.force_login(self.admin)
+        self.client.post(
+            reverse("admin:voteit_org_membership_changelist"),
+            {
+                "action": "mark_as_paid",
+                "_selected_action": [x.pk for x in self.memberships],
+            },
+        )
+        entry = BulkAuditEntry.objects.get()
+        self.assertEqual([self.memberships[1].pk], entry.object_ids)
+
+    def test_import_contacts(self):
+        rows = [{"organisation__host": "testserver", "generic_email": "a@org.se"}]
+        list(import_contacts(rows, commit=True))
+        rows[0]["invoice_email"] = "b@org.se"
+        list(import_contacts(rows, commit=True))
+        created, updated = BulkAuditEntry.objects.order_by("pk")
+        self.assertEqual(BulkAuditEntry.ACTION_CREATE, created.action)
+        self.assertEqual(["generic_email", "requires_check"], created.fields)
+        self.assertEqual(["invoice_email", "requires_check"], updated.fields)
+        self.assertEqual(created.object_ids, updated.object_ids)
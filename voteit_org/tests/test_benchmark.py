@@ -0,0 +1,49 @@
+from django.core import mail
+from django.test import TestCase
+from django.test import override_settings
+from envelope.testing import testing_channel_layers_setting
+
+from voteit.organisation.models import Organisation
+from voteit_org.jobs import get_org_managers
+from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.tests.benchmark import BenchmarkResult
+from voteit_org.tests.benchmark import compare
+from voteit_org.tests.benchmark import generate_data
+from voteit_org.tests.benchmark import run_benchmarks
+
+
+@override_settings(CHANNEL_LAYERS=testing_channel_layers_setting)
+class BenchmarkTests(TestCase):
+    def test_generate_data(self):
+        data = generate_data(20, years=2)
+        self.assertEqual(20, ContactInfo.objects.count())
+        self.assertEqual(40, Membership.objects.count())
+        self.assertEqual(1, ContactInfo.objects.filter(requires_check=True).count())
+        self.assertTrue(data.admin.is_superuser)
+        # Roles are created in bulk, but work like ones from add_roles
+        managers = get_org_managers(Organisation.objects.values_list("pk", flat=True))
+        self.assertEqual(20, len(managers))
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(generate_data(20))
+        self.assertIn("contact_info_api_cached", [x.name for x in results])
+        self.assertTrue(all(x.query_count for x in results[:3]))
+        # Stale contacts of active organisations
+        self.assertEqual(4, len(mail.outbox))
+
+    def test_compare(self):
+        baseline = {
+            "results": {
+                "job": {"wall_time": 1.0, "query_count": 10},
+                "view": {"wall_time": 1.0, "query_count": 10},
+            }
+        }
+        results = [
+            BenchmarkResult("job", wall_time=1.2, query_count=10, query_time=0.1),
+            BenchmarkResult("view", wall_time=1.5, query_count=11, query_time=0.1),
+            BenchmarkResult("new", wall_time=9.0, query_count=99, query_time=0.1),
+        ]
+        regressions = compare(baseline, results, tolerance=0.25)
+        self.assertEqual(2, len(regressions))
+        self.assertTrue(all(x.startswith("view:") for x in regressions))
@@ -0,0 +1,146 @@
+import csv
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from voteit.organisation.models import Organisation
+from voteit_org.contacts import CONTACT_CREATED
+from voteit_org.contacts import CONTACT_INVALID
+from voteit_org.contacts import CONTACT_NOT_FOUND
+from voteit_org.contacts import CONTACT_UNCHANGED
+from voteit_org.contacts import CONTACT_UPDATED
+from voteit_org.contacts import import_contacts
+from voteit_org.models import ContactInfo
+
+
+class ImportContactsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.existing = Organisation.objects.create(title="Existing", host="existing")
+        cls.contact = ContactInfo.objects.create(
+            organisation=cls.existing,
+            generic_email="info@existing.se",
+            invoice_email="faktura@existing.se",
+        )
+        cls.unchanged = Organisation.objects.create(title="Same", host="same")
+        ContactInfo.objects.create(
+            organisation=cls.unchanged,
+            generic_email="info@same.se",
+            invoice_email="faktura@same.se",
+        )
+        cls.new = Organisation.objects.create(title="New", host="new")
+
+    def _rows(self):
+        return [
+            {
+                "organisation__title": "Existing",
+                "generic_email": "ny@existing.se",
+                "invoice_email": "faktura@existing.se",
+                "text": "<p>Hej<script>alert(1)</script></p>",
+            },
+            {
+                "organisation__host": "same",
+                "generic_email": "info@same.se",
+                "invoice_email": "faktura@same.se",
+            },
+            {"organisation__title": "New", "generic_email": "info@new.se"},
+            {"organisation__title": "Nope", "generic_email": "info@nope.se"},
+            {"organisation__title": "New", "generic_email": "not an email"},
+        ]
+
+    def test_dry_run(self):
+        results = list(import_contacts(self._rows()))
+        self.assertEqual(
+            [
+                CONTACT_UPDATED,
+                CONTACT_UNCHANGED,
+                CONTACT_CREATED,
+                CONTACT_NOT_FOUND,
+                CONTACT_INVALID,
+            ],
+            [x["status"] for x in results],
+        )
+        self.assertEqual(
+            ("info@existing.se", "ny@existing.se"),
+            results[0]["changes"]["generic_email"],
+        )
+        self.assertFalse(ContactInfo.objects.filter(organisation=self.new).exists())
+
+    def test_commit(self):
+        results = list(import_contacts(self._rows(), commit=True))
+        self.assertEqual(5, len(results))
+        self.contact.refresh_from_db()
+        self.assertEqual("ny@existing.se", self.contact.generic_email)
+        self.assertNotIn("script", self.contact.text)
+        self.assertFalse(self.contact.requires_check)
+        created = ContactInfo.objects.get(organisation=self.new)
+        self.assertEqual("info@new.se", created.generic_email)
+        # Lacks invoice email
+        self.assertTrue(created.requires_check)
+
+    def test_partial_columns_keep_other_fields(self):
+        ContactInfo.objects.filter(pk=self.contact.pk).update(
+            text="<p>Kontakt</p>", invoice_info="<p>Box 1</p>"
+        )
+        rows = [{"organisation__host": "existing", "generic_email": "ny@existing.se"}]
+        results = list(import_contacts(rows, commit=True))
+        self.assertEqual({"generic_email"}, set(results[0]["changes"]))
+        self.contact.refresh_from_db()
+        self.assertEqual("ny@existing.se", self.contact.generic_email)
+        self.assertEqual("faktura@existing.se", self.contact.invoice_email)
+        self.assertEqual("<p>Kontakt</p>", self.contact.text)
+        self.assertEqual("<p>Box 1</p>", self.contact.invoice_info)
+        self.assertFalse(self.contact.requires_check)
+        # Without email columns requires_check isn't touched either
+        ContactInfo.objects.filter(pk=self.contact.pk).update(requires_check=True)
+        rows = [{"organisation__host": "existing", "text": "<p>Ny</p>"}]
+        list(import_contacts(rows, commit=True))
+        self.contact.refresh_from_db()
+        self.assertEqual("<p>Ny</p>", self.contact.text)
+        self.assertEqual("ny@existing.se", self.contact.generic_email)
+        self.assertTrue(self.contact.requires_check)
+
+    def test_ambiguous_title(self):
+        Organisation.objects.create(title="Existing", host="existing2")
+        results = list(import_contacts(self._rows()[:1]))
+        self.assertEqual(CONTACT_NOT_FOUND, results[0]["status"])
+
+    def test_command(self):
+        with TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "contacts.csv"
+            with csv_path.open("w", newline="") as f:
+                writer = csv.DictWriter(
+                    f,
+                    fieldnames=[
+                        "organisation__title",
+                        "generic_email",
+                        "invoice_email",
+                        "invoice_info",
+                        "text",
+                        "modified",
+                        "requires_check",
+                    ],
+                )
+                writer.writeheader()
+                writer.writerow(
+                    {"organisation__title": "New", "generic_email": "info@new.se"}
+                )
+            jsonl_path = Path(tmp) / "contacts.jsonl"
+            jsonl_path.write_text(
+                json.dumps({"organisation__host": "same", "invoice_email": ""}) + "\n"
+            )
+            out = StringIO()
+            call_command("import_contacts", str(csv_path), stdout=out)
+            self.assertIn("Skapade 1, uppdaterade 0", out.getvalue())
+            self.assertIn("DRY-RUN", out.getvalue())
+            call_command("import_contacts", str(csv_path), "--commit", stdout=out)
+            call_command("import_contacts", str(jsonl_path), "--commit", stdout=out)
+        self.assertTrue(ContactInfo.objects.filter(organisation=self.new).exists())
+        same = ContactInfo.objects.get(organisation=self.unchanged)
+        self.assertTrue(same.requires_check)
+        # Not in the JSONL row
+        self.assertEqual("info@same.se", same.generic_email)
@@ -0,0 +1,59 @@
+from django.test import TestCase
+
+from voteit.organisation.models import Organisation
+from voteit_org.health import refresh_organisation_health
+from voteit_org.models import ContactInfo
+from voteit_org.models import Membership
+from voteit_org.models import MembershipType
+from voteit_org.models import OrganisationHealth
+
+
+class OrganisationHealthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organisation.objects.create(title="Org", host="org")
+        cls.mem_type = MembershipType.objects.create(title="Basic", price=100)
+
+    def test_created_with_organisation(self):
+        health = OrganisationHealth.objects.get(organisation=self.org)
+        self.assertTrue(health.active)
+        self.assertFalse(health.has_contact_info)
+        self.assertIsNone(health.latest_year)
+
+    def test_follows_contact_info(self):
+        contact = ContactInfo.objects.create(
+            organisation=self.org, generic_email="a@b.com"
+        )
+        health = OrganisationHealth.objects.get(organisation=self.org)
+        self.assertTrue(health.has_contact_info)
+        self.assertFalse(health.contact_complete)
+        self.assertTrue(health.requires_check)
+        contact.invoice_email = "a@b.com"
+        contact.requires_check = False
+        contact.save()
+        health.refresh_from_db()
+        self.assertTrue(health.contact_complete)
+        self.assertFalse(health.requires_check)
+        self.assertEqual(contact.modified, health.contact_modified)
+
+    def test_follows_latest_membership(self):
+        Membership.objects.create(
+            organisation=self.org, year=2024, membership_type=self.mem_type, paid=True
+        )
+        latest = Membership.objects.create(
+            organisation=self.org, year=2025, membership_type=self.mem_type
+        )
+        health = OrganisationHealth.objects.get(organisation=self.org)
+        self.assertEqual(2025, health.latest_year)
+        self.assertFalse(health.latest_paid)
+        Membership.objects.filter(pk=latest.pk).update(paid=True)
+        self.assertEqual(1, refresh_organisation_health([self.org.pk]))
+        health.refresh_from_db()
+        self.assertTrue(health.latest_paid)
+
+    def test_refresh_all(self):
+        OrganisationHealth.objects.all().delete()
+        refresh_organisation_health()
+        self.assertTrue(
+            OrganisationHealth.objects.filter(organisation=self.org).exists()
+        )
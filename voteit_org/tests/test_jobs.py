@@ -1,19 +1,100 @@
+from datetime import timedelta
+from time import perf_counter
+from unittest import mock
+from unittest import skipUnless
+from uuid import uuid4
+
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+from django.template import loader
+from django.test import SimpleTestCase
 from django.test import TestCase
 from django.test import override_settings
+from django.utils.html import strip_tags
+from django.utils.timezone import now
 from envelope.testing import testing_channel_layers_setting
 
 from voteit.organisation.models import Organisation
 from voteit.organisation.roles import ROLE_ORG_MANAGER
+from voteit_org.jobs import CHECK_EMAIL_CACHE_SIZE
+from voteit_org.jobs import CHECK_EMAIL_TEMPLATE
+from voteit_org.jobs import _render_org_check
+from voteit_org.jobs import check_reminder_qs
 from voteit_org.jobs import email_org_about_check
+from voteit_org.jobs import email_orgs_about_check
+from voteit_org.jobs import get_org_managers
+from voteit_org.jobs import might_require_check_qs
+from voteit_org.jobs import org_might_require_check
 from voteit_org.jobs import render_org_check_email
+from voteit_org.jobs import render_org_check_parts
 from voteit_org.models import ContactInfo
+from voteit_org.models import JobCheckpoint
+from voteit_org.models import OrgCheckMail
 
 
 User = get_user_model()
 
 
+class UnreachableEmailBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("Connection refused")
+
+    def send_messages(self, email_messages):
+        raise AssertionError("Never opened")
+
+
+class RenderOrgCheckBenchmarkTests(SimpleTestCase):
+    renders = 10_000
+
+    def setUp(self):
+        self.contacts = [
+            ContactInfo(
+                organisation=Organisation(title=f"Org {i}", host=f"org{i}.voteit.se")
+            )
+            for i in range(self.renders)
+        ]
+        self.managers = {"Someone Managerly", "Another Person"}
+        _render_org_check.cache_clear()
+
+    def _time(self, render, contacts) -> float:
+        started = perf_counter()
+        for contact in contacts:
+            render(contact, self.managers)
+        return perf_counter() - started
+
+    def _render_uncached(self, contact, org_managers):
+        # As it was done before memoizing
+        html_body = loader.render_to_string(
+            CHECK_EMAIL_TEMPLATE,
+            context={
+                "site_url": f"https://{contact.organisation.host}/",
+                "org_title": contact.organisation.title,
+                "org_managers": org_managers,
+            },
+        )
+        return html_body, strip_tags(html_body)
+
+    def test_render_org_check_parts_benchmark(self):
+        uncached = self._time(self._render_uncached, self.contacts)
+        # Every organisation is distinct, so each call is a cache miss
+        cold = self._time(render_org_check_parts, self.contacts)
+        # As many calls, spread over organisations that fit in the cache
+        warm_contacts = self.contacts[:CHECK_EMAIL_CACHE_SIZE]
+        for contact in warm_contacts:
+            render_org_check_parts(contact, self.managers)
+        warm = self._time(
+            render_org_check_parts,
+            (warm_contacts[i % len(warm_contacts)] for i in range(self.renders)),
+        )
+        timings = f"uncached {uncached:.3f}s, cold {cold:.3f}s, warm {warm:.3f}s"
+        print(f"\n{self.renders} check email renders: {timings}")
+        # Misses render like before, with some margin for noise
+        self.assertLess(cold, uncached * 1.5, timings)
+        self.assertLess(warm, uncached, timings)
+
+
 @override_settings(CHANNEL_LAYERS=testing_channel_layers_setting)
 class JobsTests(TestCase):
     @classmethod
@@ -42,6 +123,13 @@ class JobsTests(TestCase):
         self.assertIn("Someone Managerly", output)
         self.assertNotIn("Betahaus Person", output)
 
+    def test_render_org_check_parts(self):
+        html_body, text_body = render_org_check_parts(
+            self.contact, {"Someone Managerly"}
+        )
+        self.assertIn("<li>Someone Managerly</li>", html_body)
+        self.assertEqual(strip_tags(html_body), text_body)
+
     def test_email_org_about_check(self):
         email_org_about_check(self.contact.id)
         # Email sent?
@@ -50,3 +138,180 @@ class JobsTests(TestCase):
         self.assertEqual(["hello@betahaus.net"], msg.to)
         self.assertEqual("Kolla era uppgifter hos föreningen VoteIT", msg.subject)
         self.assertIn("Kontaktinformation", msg.body)
+
+    def test_email_orgs_about_check(self):
+        other_org = Organisation.objects.create(title="Another org", host="another")
+        other_contact = ContactInfo.objects.create(
+            organisation=other_org, generic_email="hello@another.org"
+        )
+        # Contacts, send log create, claim and lookup, org managers, one send log
+        # update per message and the JobRun record
+        with self.assertNumQueries(8):
+            output = email_orgs_about_check([self.contact.pk, other_contact.pk])
+        self.assertEqual(2, len(mail.outbox))
+        self.assertEqual(
+            {"hello@betahaus.net", "hello@another.org"},
+            {x.to[0] for x in mail.outbox},
+        )
+        bodies = {x.to[0]: x.body for x in mail.outbox}
+        self.assertIn("Someone Managerly", bodies["hello@betahaus.net"])
+        self.assertNotIn("Someone Managerly", bodies["hello@another.org"])
+        self.assertIn("Another org", output)
+
+    def test_email_orgs_about_check_resumable(self):
+        email_orgs_about_check([self.contact.pk], period="2026-01")
+        self.assertEqual(1, len(mail.outbox))
+        log = OrgCheckMail.objects.get(contact_info=self.contact, period="2026-01")
+        self.assertTrue(log.sent)
+        self.assertEqual(1, log.attempts)
+        # Already sent
+        output = email_orgs_about_check([self.contact.pk], period="2026-01")
+        self.assertEqual("", output)
+        self.assertEqual(1, len(mail.outbox))
+        email_orgs_about_check([self.contact.pk], period="2026-02")
+        self.assertEqual(2, len(mail.outbox))
+
+    def test_email_orgs_about_check_claimed(self):
+        # Claimed by an overlapping job, or one that died while sending
+        OrgCheckMail.objects.create(
+            contact_info=self.contact, period="2026-01", claim_token=uuid4()
+        )
+        self.assertEqual("", email_orgs_about_check([self.contact.pk], "2026-01"))
+        self.assertFalse(mail.outbox)
+
+    def test_email_orgs_about_check_failed_released(self):
+        def fail_all(connection, messages, on_sent, on_failed):
+            for key, message in messages:
+                on_failed(key, "SMTPException()", 1)
+            return 0
+
+        with mock.patch("voteit_org.jobs.send_throttled", side_effect=fail_all):
+            email_orgs_about_check([self.contact.pk], period="2026-01")
+        log = OrgCheckMail.objects.get(contact_info=self.contact, period="2026-01")
+        self.assertIsNone(log.claim_token)
+        self.assertIsNone(log.sent)
+        email_orgs_about_check([self.contact.pk], period="2026-01")
+        self.assertEqual(1, len(mail.outbox))
+
+    def test_email_orgs_about_check_unreachable_released(self):
+        with override_settings(
+            EMAIL_BACKEND="voteit_org.tests.test_jobs.UnreachableEmailBackend"
+        ):
+            with self.assertRaises(ConnectionRefusedError):
+                email_orgs_about_check([self.contact.pk], period="2026-01")
+        log = OrgCheckMail.objects.get(contact_info=self.contact, period="2026-01")
+        self.assertIsNone(log.claim_token)
+        self.assertIsNone(log.sent)
+        self.assertIn("Connection refused", log.error)
+        # Not dropped for the period
+        email_orgs_about_check([self.contact.pk], period="2026-01")
+        self.assertEqual(1, len(mail.outbox))
+
+    def test_get_org_managers(self):
+        self.assertEqual(
+            {self.org.pk: {"Someone Managerly"}}, get_org_managers([self.org.pk])
+        )
+
+    def test_get_org_managers_query_count(self):
+        orgs = [self.org]
+        for i in range(5):
+            org = Organisation.objects.create(title=f"Org {i}", host=f"org{i}")
+            org.add_roles(
+                org.users.create(username=f"manager{i}", first_name=f"Manager {i}"),
+                ROLE_ORG_MANAGER,
+            )
+            orgs.append(org)
+        with self.assertNumQueries(1):
+            self.assertEqual(1, len(get_org_managers([self.org.pk])))
+        with self.assertNumQueries(1):
+            result = get_org_managers([x.pk for x in orgs])
+        self.assertEqual(6, len(result))
+        self.assertEqual({"Manager 4"}, result[orgs[-1].pk])
+
+    def _make_stale(self, *contacts: ContactInfo, days=400):
+        ContactInfo.objects.filter(pk__in=[x.pk for x in contacts]).update(
+            modified=now() - timedelta(days=days), requires_check=False
+        )
+
+    def test_missing_email_flagged_on_save(self):
+        self.assertTrue(self.contact.requires_check)
+        self.contact.invoice_email = "bill@betahaus.net"
+        self.contact.requires_check = False
+        self.contact.save()
+        self.contact.refresh_from_db()
+        self.assertFalse(self.contact.requires_check)
+
+    def test_org_might_require_check(self):
+        self._make_stale(self.contact)
+        self.assertEqual(1, org_might_require_check())
+        self.contact.refresh_from_db()
+        self.assertTrue(self.contact.requires_check)
+        self.assertEqual(0, org_might_require_check())
+
+    def test_org_might_require_check_refreshes_flagged_health(self):
+        self._make_stale(self.contact)
+        with mock.patch("voteit_org.jobs.refresh_organisation_health") as refresh:
+            org_might_require_check()
+            refresh.assert_called_once()
+            self.assertEqual([self.org.pk], list(refresh.call_args.args[0]))
+            refresh.reset_mock()
+            org_might_require_check()
+            refresh.assert_not_called()
+
+    def test_org_might_require_check_incremental(self):
+        org = Organisation.objects.create(title="Complete", host="c")
+        complete = ContactInfo.objects.create(
+            organisation=org, generic_email="a@b.com", invoice_email="a@b.com"
+        )
+        self.assertEqual(0, org_might_require_check())
+        # As if the last run was 5 days ago
+        JobCheckpoint.objects.update(timestamp=now() - timedelta(days=370))
+        # Went stale after the last run
+        self._make_stale(complete, days=366)
+        # Old enough to have been handled by a previous run already
+        self._make_stale(self.contact, days=800)
+        self.assertEqual(1, org_might_require_check())
+        complete.refresh_from_db()
+        self.assertTrue(complete.requires_check)
+        self.contact.refresh_from_db()
+        self.assertFalse(self.contact.requires_check)
+        self.assertEqual(1, org_might_require_check(full=True))
+
+    def test_org_might_require_check_batched(self):
+        contacts = [self.contact]
+        for i in range(4):
+            org = Organisation.objects.create(title=f"Org {i}", host=f"org{i}")
+            contacts.append(
+                ContactInfo.objects.create(organisation=org, generic_email="a@b.com")
+            )
+        complete = ContactInfo.objects.create(
+            organisation=Organisation.objects.create(title="Complete", host="c"),
+            generic_email="a@b.com",
+            invoice_email="a@b.com",
+        )
+        self._make_stale(*contacts, days=10)
+        self.assertEqual(5, org_might_require_check(batch_size=2))
+        complete.refresh_from_db()
+        self.assertFalse(complete.requires_check)
+        self.assertEqual(0, org_might_require_check(batch_size=2))
+
+
+@skipUnless(connection.vendor == "postgresql", "Query plans are checked on Postgres")
+class JobQueryPlanTests(TestCase):
+    def setUp(self):
+        # Tables are tiny in tests, make the planner pick indexes when it can
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def test_might_require_check_uses_indexes(self):
+        plan = might_require_check_qs().explain()
+        self.assertIn("contactinfo_unchecked_mod_idx", plan)
+        self.assertIn("contactinfo_missing_email_idx", plan)
+
+    def test_check_reminder_uses_index(self):
+        plan = check_reminder_qs().explain()
+        self.assertIn("contactinfo_check_mod_idx", plan)
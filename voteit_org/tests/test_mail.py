@@ -0,0 +1,140 @@
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.mail import get_connection
+from django.test import SimpleTestCase
+from django.test import override_settings
+
+from voteit_org.mail import SharedRateLimit
+from voteit_org.mail import TokenBucket
+from voteit_org.mail import send_throttled
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class FlakyConnection:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.sent = []
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def send_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise SMTPException("Try again")
+        self.sent.extend(messages)
+        return len(messages)
+
+    def close(self):
+        pass
+
+
+def _messages(count: int):
+    return [
+        (i, EmailMessage(subject="Hello", body="Hi", to=[f"{i}@voteit.se"]))
+        for i in range(count)
+    ]
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+        for _ in range(10):
+            bucket.take()
+        # Burst of 2, then 8 at 2 per second
+        self.assertAlmostEqual(4.0, clock.now)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SharedRateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_shared_between_senders(self):
+        clock = FakeClock()
+        # As two mailer jobs in different workers
+        limits = [
+            SharedRateLimit(rate=2, clock=clock, sleep=clock.sleep) for _ in range(2)
+        ]
+        for i in range(10):
+            limits[i % 2].take()
+        # 2 per one second window, together
+        self.assertAlmostEqual(4.0, clock.now)
+
+
+class SendThrottledTests(SimpleTestCase):
+    def test_locmem_rate_limited(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=1, clock=clock, sleep=clock.sleep)
+        sent = []
+        with self.settings(
+            EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+        ):
+            with get_connection() as connection:
+                count = send_throttled(
+                    connection,
+                    _messages(21),
+                    on_sent=lambda key, attempts: sent.append(key),
+                    on_failed=lambda *args: self.fail("Shouldn't fail"),
+                    bucket=bucket,
+                )
+        self.assertEqual(21, count)
+        self.assertEqual(21, len(mail.outbox))
+        self.assertEqual(list(range(21)), sent)
+        self.assertAlmostEqual(2.0, clock.now)
+
+    def test_retries_with_backoff(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1000, clock=clock, sleep=clock.sleep)
+        connection = FlakyConnection(failures=2)
+        sent = []
+        count = send_throttled(
+            connection,
+            _messages(1),
+            on_sent=lambda key, attempts: sent.append((key, attempts)),
+            on_failed=lambda *args: self.fail("Shouldn't fail"),
+            bucket=bucket,
+            retries=3,
+            backoff=1,
+        )
+        self.assertEqual(1, count)
+        self.assertEqual([(0, 3)], sent)
+        # Reopened once per failure, not left to open per message
+        self.assertEqual(2, connection.opened)
+        self.assertEqual([1, 2], [x for x in clock.slept if x >= 1])
+
+    def test_gives_up(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1000, clock=clock, sleep=clock.sleep)
+        connection = FlakyConnection(failures=10)
+        failed = []
+        count = send_throttled(
+            connection,
+            _messages(2),
+            on_sent=lambda *args: self.fail("Shouldn't send"),
+            on_failed=lambda key, error, attempts: failed.append((key, attempts)),
+            bucket=bucket,
+            retries=1,
+            backoff=0,
+        )
+        self.assertEqual(0, count)
+        self.assertEqual([(0, 2), (1, 2)], failed)
@@ -0,0 +1,306 @@
+from io import StringIO
+from threading import Barrier
+from threading import Thread
+from unittest import skipUnless
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.db import connection
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from voteit.organisation.models import Organisation
+from voteit_org.memberships import apply_membership_summary_deltas
+from voteit_org.memberships import refresh_membership_summary
+from voteit_org.models import ArchivedMembership
+from voteit_org.models import BulkAuditEntry
+from voteit_org.models import Membership
+from voteit_org.models import MembershipSummary
+from voteit_org.models import MembershipType
+from voteit_org.models import OrganisationHealth
+
+
+class MembershipSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organisation.objects.create(title="Org", host="org")
+        cls.other_org = Organisation.objects.create(title="Other", host="other")
+        cls.basic = MembershipType.objects.create(title="Basic", price=100)
+        cls.large = MembershipType.objects.create(title="Large", price=1000)
+
+    def _summary(self, year):
+        return {
+            (x.membership_type_id, x.paid): (x.count, x.total)
+            for x in MembershipSummary.objects.filter(year=year)
+        }
+
+    def test_kept_up_to_date_on_save(self):
+        mem = Membership.objects.create(
+            organisation=self.org, year=2025, membership_type=self.basic
+        )
+        Membership.objects.create(
+            organisation=self.other_org, year=2025, membership_type=self.basic
+        )
+        self.assertEqual({(self.basic.pk, False): (2, 200)}, self._summary(2025))
+        mem.paid = True
+        mem.save()
+        self.assertEqual(
+            {(self.basic.pk, False): (1, 100), (self.basic.pk, True): (1, 100)},
+            self._summary(2025),
+        )
+        mem.year = 2026
+        mem.save()
+        self.assertEqual({(self.basic.pk, False): (1, 100)}, self._summary(2025))
+        self.assertEqual({(self.basic.pk, True): (1, 100)}, self._summary(2026))
+        mem.delete()
+        self.assertEqual({}, self._summary(2026))
+
+    def test_two_writers_same_year(self):
+        first = Membership.objects.create(
+            organisation=self.org, year=2025, membership_type=self.basic
+        )
+        second = Membership.objects.create(
+            organisation=self.other_org, year=2025, membership_type=self.basic
+        )
+        # Loaded before either write, as by two concurrent requests
+        first = Membership.objects.get(pk=first.pk)
+        second = Membership.objects.get(pk=second.pk)
+        first.paid = True
+        with CaptureQueriesContext(connection) as queries:
+            first.save()
+        second.membership_type = self.large
+        second.save()
+        expected = {(self.basic.pk, True): (1, 100), (self.large.pk, False): (1, 1000)}
+        self.assertEqual(expected, self._summary(2025))
+        # Rows are adjusted, the year isn't counted again
+        self.assertFalse(
+            [x for x in queries.captured_queries if "COUNT(" in x["sql"].upper()]
+        )
+        refresh_membership_summary([2025])
+        self.assertEqual(expected, self._summary(2025))
+
+    def test_price_change(self):
+        Membership.objects.create(
+            organisation=self.org, year=2025, membership_type=self.large
+        )
+        self.large.price = 2000
+        self.large.save()
+        self.assertEqual({(self.large.pk, False): (1, 2000)}, self._summary(2025))
+
+    def test_refresh_after_bulk_update(self):
+        Membership.objects.create(
+            organisation=self.org, year=2025, membership_type=self.basic
+        )
+        Membership.objects.filter(year=2025).update(membership_type=self.large)
+        refresh_membership_summary([2025])
+        self.assertEqual({(self.large.pk, False): (1, 1000)}, self._summary(2025))
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs concurrent connections")
+class ConcurrentMembershipSummaryTests(TransactionTestCase):
+    def test_two_writers_same_year(self):
+        basic = MembershipType.objects.create(title="Basic", price=100)
+        orgs = [
+            Organisation.objects.create(title=f"Org {i}", host=f"org{i}")
+            for i in range(2)
+        ]
+        barrier = Barrier(len(orgs))
+        errors = []
+
+        def create(org):
+            try:
+                barrier.wait()
+                Membership.objects.create(
+                    organisation=org, year=2025, membership_type=basic
+                )
+            except Exception as exc:  # pragma: no cover
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=create, args=(org,)) for org in orgs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        summary = MembershipSummary.objects.get(year=2025)
+        self.assertEqual((2, 200), (summary.count, summary.total))
+        # Deltas are applied with the same lock, in any order
+        apply_membership_summary_deltas({(2025, basic.pk, False): -1})
+        self.assertEqual(1, MembershipSummary.objects.get(year=2025).count)
+
+
+class ArchiveMembershipsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organisation.objects.create(title="Org", host="org")
+        cls.basic = MembershipType.objects.create(title="Basic", price=100)
+        for year, paid in ((2022, True), (2023, False), (2024, True)):
+            Membership.objects.create(
+                organisation=cls.org, year=year, membership_type=cls.basic, paid=paid
+            )
+
+    def _archive(self, *args):
+        call_command("archive_memberships", *args, stdout=StringIO())
+
+    def test_dry_run(self):
+        self._archive("--before", "2025")
+        self.assertEqual(3, Membership.objects.count())
+        self.assertFalse(ArchivedMembership.objects.exists())
+
+    def test_archive_paid_years(self):
+        self._archive("--before", "2025", "--commit")
+        # Stops at the first year with unpaid memberships
+        self.assertEqual(
+            {2023, 2024}, set(Membership.objects.values_list("year", flat=True))
+        )
+        self.assertEqual(
+            [2022], list(ArchivedMembership.objects.values_list("year", flat=True))
+        )
+        # Summaries for archived years are kept
+        refresh_membership_summary()
+        self.assertTrue(MembershipSummary.objects.filter(year=2022).exists())
+        self.assertEqual(
+            2024, OrganisationHealth.objects.get(organisation=self.org).latest_year
+        )
+        entry = BulkAuditEntry.objects.get(source="archive_memberships")
+        self.assertEqual(BulkAuditEntry.ACTION_CREATE, entry.action)
+        self.assertEqual(
+            list(ArchivedMembership.objects.values_list("pk", flat=True)),
+            entry.object_ids,
+        )
+
+    def test_archived_once(self):
+        self._archive("--before", "2023", "--commit")
+        archived = ArchivedMembership.objects.get()
+        with self.assertRaises(IntegrityError):
+            ArchivedMembership.objects.create(
+                organisation=Organisation.objects.create(title="Other", host="other"),
+                year=2022,
+                membership_type=self.basic,
+                paid=True,
+                original_id=archived.original_id,
+                archived=now(),
+            )
+
+    def test_archive_only_membership(self):
+        other = Organisation.objects.create(title="Other", host="other")
+        Membership.objects.filter(year__gt=2022).update(paid=True)
+        Membership.objects.filter(year__gt=2022).update(organisation=other)
+        self._archive("--before", "2023", "--commit")
+        health = OrganisationHealth.objects.get(organisation=self.org)
+        self.assertEqual(2022, health.latest_year)
+        self.assertTrue(health.latest_paid)
+
+    def test_archived_year_stays_unique(self):
+        self._archive("--before", "2025", "--commit")
+        membership = Membership(
+            organisation=self.org, year=2022, membership_type=self.basic
+        )
+        with self.assertRaises(ValidationError):
+            membership.full_clean()
+        with self.assertRaises(ValidationError):
+            Membership.objects.create(
+                organisation=self.org, year=2022, membership_type=self.basic
+            )
+
+
+class CreateMembershipsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.basic = MembershipType.objects.create(title="Basic", price=100)
+        cls.large = MembershipType.objects.create(title="Large", price=1000)
+        cls.old = MembershipType.objects.create(title="Old", price=10, active=False)
+        cls.large_org = Organisation.objects.create(title="Large org", host="large")
+        cls.old_org = Organisation.objects.create(title="Old org", host="old")
+        cls.new_org = Organisation.objects.create(title="New org", host="new")
+        cls.archived_org = Organisation.objects.create(title="Archived", host="arch")
+        cls.inactive_org = Organisation.objects.create(
+            title="Inactive", host="inactive", active=False
+        )
+        for org, year, mem_type in (
+            (cls.large_org, 2024, cls.basic),
+            (cls.large_org, 2025, cls.large),
+            (cls.old_org, 2025, cls.old),
+            (cls.inactive_org, 2025, cls.large),
+            # Already there, kept as it is
+            (cls.large_org, 2026, cls.basic),
+        ):
+            Membership.objects.create(
+                organisation=org, year=year, membership_type=mem_type
+            )
+        ArchivedMembership.objects.create(
+            organisation=cls.archived_org,
+            year=2020,
+            membership_type=cls.large,
+            paid=True,
+            original_id=1,
+            archived=now(),
+        )
+
+    def _create(self, *args) -> str:
+        out = StringIO()
+        call_command("create_memberships", "2026", "--mem", "Basic", *args, stdout=out)
+        return out.getvalue()
+
+    def _types(self, year: int) -> dict:
+        return dict(
+            Membership.objects.filter(year=year).values_list(
+                "organisation__title", "membership_type__title"
+            )
+        )
+
+    def test_single_type(self):
+        self._create("--commit")
+        self.assertEqual(
+            {
+                "Large org": "Basic",
+                "Old org": "Basic",
+                "New org": "Basic",
+                "Archived": "Basic",
+            },
+            self._types(2026),
+        )
+
+    def test_carry_forward_dry_run(self):
+        output = self._create("--until", "2027", "--carry-forward")
+        self.assertIn("2026 Basic: 2", output)
+        self.assertIn("2026 Large: 1", output)
+        self.assertIn("2027 Large: 1", output)
+        self.assertIn("2027 Basic: 3", output)
+        self.assertFalse(Membership.objects.filter(year=2027).exists())
+
+    def test_carry_forward(self):
+        self._create("--until", "2027", "--carry-forward", "--commit")
+        expected = {
+            "Large org": "Basic",
+            "Old org": "Basic",
+            "New org": "Basic",
+            "Archived": "Large",
+        }
+        self.assertEqual(expected, self._types(2026))
+        # Large org's existing 2026 membership is the latest one for 2027
+        self.assertEqual(expected, self._types(2027))
+        self.assertEqual(
+            1,
+            MembershipSummary.objects.get(
+                year=2027, membership_type=self.large, paid=False
+            ).count,
+        )
+
+    def test_inactive_fallback_type(self):
+        with self.assertRaises(SystemExit):
+            call_command(
+                "create_memberships",
+                "2026",
+                "--mem",
+                "Old",
+                "--carry-forward",
+                "--commit",
+                stdout=StringIO(),
+            )
+        self.assertEqual(1, Membership.objects.filter(year=2026).count())
@@ -0,0 +1,64 @@
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from django.test import TestCase
+from django.test import override_settings
+
+from voteit_org.metrics import instrumented_job
+from voteit_org.metrics import record_emails
+from voteit_org.models import JobRun
+
+
+@instrumented_job
+def _counting_job(fail=False):
+    record_emails(2)
+    JobRun.objects.count()
+    JobRun.objects.count()
+    if fail:
+        raise ValueError("Nope")
+    return 5
+
+
+@instrumented_job
+def _outer_job():
+    _counting_job()
+    return "Done"
+
+
+class InstrumentedJobTests(TestCase):
+    def test_records_run(self):
+        self.assertEqual(5, _counting_job())
+        run = JobRun.objects.get()
+        self.assertEqual("_counting_job", run.name)
+        self.assertEqual(2, run.query_count)
+        self.assertEqual(2, run.emails_sent)
+        self.assertEqual(5, run.rows_affected)
+        self.assertTrue(run.success)
+        self.assertGreater(run.wall_time, 0)
+
+    def test_records_failure(self):
+        with self.assertRaises(ValueError):
+            _counting_job(fail=True)
+        run = JobRun.objects.get()
+        self.assertFalse(run.success)
+        self.assertIn("Nope", run.error)
+
+    def test_nested_counts_towards_outer(self):
+        self.assertEqual("Done", _outer_job())
+        run = JobRun.objects.get()
+        self.assertEqual("_outer_job", run.name)
+        self.assertEqual(2, run.emails_sent)
+        self.assertIsNone(run.rows_affected)
+
+    def test_textfile_and_profile(self):
+        with TemporaryDirectory() as tmp:
+            with override_settings(
+                VOTEIT_ORG_METRICS_DIR=tmp,
+                VOTEIT_ORG_PROFILE_DIR=tmp,
+                VOTEIT_ORG_PROFILE_THRESHOLD=0,
+            ):
+                _counting_job()
+            text = (Path(tmp) / "voteit_org__counting_job.prom").read_text()
+            self.assertIn('voteit_org_job_emails_sent{job="_counting_job"} 2', text)
+            run = JobRun.objects.get()
+            self.assertTrue(Path(run.profile).exists())
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.test import TestCase
+
+from voteit.organisation.models import Organisation
+from voteit_org.models import ContactInfo
+from voteit_org.sanitize import CachedHTMLCleaner
+from voteit_org.sanitize import cached_relaxed_clean_html
+
+
+def _strip_script(value: str) -> str:
+    return value.replace("<script>", "").replace("</script>", "")
+
+
+class CachedHTMLCleanerTests(SimpleTestCase):
+    def setUp(self):
+        self.cleaner_mock = mock.Mock(side_effect=_strip_script)
+        self.cleaner = CachedHTMLCleaner(self.cleaner_mock, maxsize=3)
+
+    def test_cleans_once(self):
+        self.assertEqual("<p>x</p>", self.cleaner("<p><script>x</script></p>"))
+        self.assertEqual("<p>x</p>", self.cleaner("<p><script>x</script></p>"))
+        # Cleaned output counts as clean
+        self.assertEqual("<p>x</p>", self.cleaner("<p>x</p>"))
+        self.assertEqual(1, self.cleaner_mock.call_count)
+        self.assertEqual(2, self.cleaner.hits)
+
+    def test_empty(self):
+        self.assertEqual("", self.cleaner(""))
+        self.cleaner_mock.assert_not_called()
+
+    def test_bounded(self):
+        for i in range(5):
+            self.cleaner(f"<p>{i}</p>")
+        self.assertEqual(3, len(self.cleaner._cache))
+        self.cleaner("<p>0</p>")
+        self.assertEqual(6, self.cleaner_mock.call_count)
+        self.cleaner("<p>4</p>")
+        self.assertEqual(6, self.cleaner_mock.call_count)
+
+    def test_clean_many(self):
+        values = ["<p>a</p>", "<p>b</p>", "<p>a</p>", ""]
+        result = self.cleaner.clean_many(values)
+        self.assertEqual({"<p>a</p>", "<p>b</p>", ""}, set(result))
+        self.assertEqual(2, self.cleaner_mock.call_count)
+        # Batches don't push out what single saves use
+        self.assertEqual(0, len(self.cleaner._cache))
+
+    def test_mark_clean(self):
+        self.cleaner.mark_clean("<p>x</p>")
+        self.assertEqual("<p>x</p>", self.cleaner("<p>x</p>"))
+        self.cleaner_mock.assert_not_called()
+
+
+class ContactInfoSanitizeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organisation.objects.create(title="Org", host="org")
+
+    def setUp(self):
+        cached_relaxed_clean_html.clear()
+
+    def test_unchanged_fields_not_parsed_again(self):
+        ContactInfo.objects.create(
+            organisation=self.org,
+            text="<p>Kontakt</p>",
+            invoice_info="<p>Box 1<script>x</script></p>",
+        )
+        # As in a worker that didn't do the earlier save
+        cached_relaxed_clean_html.clear()
+        contact = ContactInfo.objects.get()
+        contact.generic_email = "info@org.se"
+        with mock.patch.object(
+            cached_relaxed_clean_html,
+            "cleaner",
+            wraps=cached_relaxed_clean_html.cleaner,
+        ) as cleaner:
+            contact.save()
+        cleaner.assert_not_called()
+        self.assertEqual(0, cached_relaxed_clean_html.misses)
+
+    def test_changed_field_is_cleaned(self):
+        ContactInfo.objects.create(organisation=self.org, text="<p>Kontakt</p>")
+        contact = ContactInfo.objects.get()
+        contact.text = "<p>Ny<script>x</script></p>"
+        contact.save()
+        self.assertNotIn("script", ContactInfo.objects.get().text)
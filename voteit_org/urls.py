@@ -0,0 +1,7 @@
+from django.urls import path
+
+from voteit_org.rest_api.async_views import contact_info
+
+urlpatterns = [
+    path("contact-info-async/", contact_info, name="contact-info-async"),
+]